@@ -0,0 +1,91 @@
+"""Checks that the feed queries use the composite indexes on Post.
+
+Seeds a separate SQLite database and prints the query plan and the best
+wall time of the index, category and profile feed queries:
+
+    python benchmarks/feed_indexes.py --posts 1000000
+"""
+import argparse
+import random
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from utils import setup_django, timed
+
+BATCH_SIZE = 10000
+
+
+def seed(posts, seed_value):
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+    from django.utils import timezone
+
+    from blog.models import Category, Location, Post
+
+    rng = random.Random(seed_value)
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'user{i}') for i in range(1000))
+    Category.objects.bulk_create(
+        Category(title=f'Категория {i}', description='', slug=f'cat-{i}',
+                 is_published=i % 10 != 0)
+        for i in range(50))
+    Location.objects.bulk_create(
+        Location(name=f'Место {i}') for i in range(100))
+    user_ids = list(User.objects.values_list('id', flat=True))
+    category_ids = list(Category.objects.values_list('id', flat=True))
+    location_ids = list(Location.objects.values_list('id', flat=True))
+
+    now = timezone.now()
+    for start in range(0, posts, BATCH_SIZE):
+        with transaction.atomic():
+            Post.objects.bulk_create(
+                Post(
+                    title=f'Пост {i}',
+                    text='Текст',
+                    pub_date=now - timedelta(
+                        minutes=rng.randint(-60 * 24 * 30,
+                                            60 * 24 * 365 * 5)),
+                    author_id=rng.choice(user_ids),
+                    category_id=rng.choice(category_ids),
+                    location_id=rng.choice(location_ids),
+                    is_published=rng.random() > 0.1,
+                )
+                for i in range(start, min(start + BATCH_SIZE, posts)))
+    return Category.objects.get(slug='cat-1'), User.objects.get(
+        username='user0')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(Path(tmp) / 'bench.sqlite3')
+        from django.db import connection
+
+        from blog.views import (get_posts_gs_by_author,
+                                get_posts_qs_by_category)
+
+        category, author = seed(args.posts, args.seed)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        feeds = {
+            'index': get_posts_qs_by_category(),
+            'category': get_posts_qs_by_category().filter(
+                category__slug=category.slug),
+            'profile': get_posts_gs_by_author(author.username),
+        }
+        for name, queryset in feeds.items():
+            page = queryset[:10]
+            print(f'== {name} feed')
+            print(page.explain())
+            print(f'best of 5: {timed(lambda: list(page.all())):.2f} ms\n')
+
+
+if __name__ == '__main__':
+    main()
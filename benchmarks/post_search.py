@@ -0,0 +1,100 @@
+"""Compares the FTS5 post search with the icontains scan it replaces.
+
+Seeds a separate SQLite database with posts made of random words, then
+prints the best wall time of the first results page for each query:
+
+    python benchmarks/post_search.py --posts 1000000
+"""
+import argparse
+import random
+import tempfile
+from datetime import timedelta
+from itertools import accumulate
+from pathlib import Path
+
+from utils import setup_django, timed
+
+BATCH_SIZE = 10000
+SYLLABLES = (
+    'ба ве ги до жу за ки ло му не по ра си ту фа хо це чи ша ю'.split())
+VOCABULARY_SIZE = 20000
+
+
+def make_vocabulary(rng):
+    """Returns distinct pseudo-words with Zipf-like cumulative weights."""
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words, list(accumulate(
+        1 / rank for rank in range(1, len(words) + 1)))
+
+
+def make_queries(words):
+    """Picks a frequent, a mid-frequency and a rare word plus a prefix."""
+    return (words[0], words[100], words[5000], f'{words[0]} {words[100]}',
+            words[100][:3])
+
+
+def seed(posts, seed_value):
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+    from django.utils import timezone
+
+    from blog.models import Category, Post
+
+    rng = random.Random(seed_value)
+    words, weights = make_vocabulary(rng)
+    author = get_user_model().objects.create(username='author')
+    category = Category.objects.create(
+        title='Категория', description='', slug='cat')
+    now = timezone.now()
+    for start in range(0, posts, BATCH_SIZE):
+        with transaction.atomic():
+            Post.objects.bulk_create(
+                Post(
+                    title=' '.join(rng.choices(
+                        words, cum_weights=weights, k=4)).capitalize(),
+                    text=' '.join(rng.choices(
+                        words, cum_weights=weights, k=60)),
+                    pub_date=now - timedelta(minutes=rng.randint(0, 10 ** 6)),
+                    author=author,
+                    category=category,
+                )
+                for _ in range(start, min(start + BATCH_SIZE, posts)))
+    return make_queries(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(Path(tmp) / 'bench.sqlite3')
+        from django.db.models import Q
+
+        from blog.views import get_posts_qs_by_category, get_posts_qs_by_search
+
+        for query in seed(args.posts, args.seed):
+            scan = get_posts_qs_by_category()
+            for term in query.split():
+                scan = scan.filter(Q(title__icontains=term)
+                                   | Q(text__icontains=term))
+            searches = {
+                'fts5': get_posts_qs_by_search(query),
+                'icontains': scan,
+            }
+            print(f'== {query!r}')
+            for name, queryset in searches.items():
+                page = queryset[:10]
+                count = timed(queryset.count, repeat=3)
+                first = timed(lambda: list(page.all()), repeat=3)
+                print(f'{name:>9}: page {first:.2f} ms, count {count:.2f} ms')
+            print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""Measures every blog and pages route against a JSON baseline.
+
+Seeds a separate SQLite database with bulk inserts, requests each route as
+an anonymous visitor or as a logged-in author and records the query
+count, p50/p95 latency and response size:
+
+    python benchmarks/routes.py --update-baseline
+    python benchmarks/routes.py --check
+
+--check exits with status 1 when a route runs more queries than in
+benchmarks/baseline.json or its p50 grows beyond the tolerance. p95 is
+recorded but not checked: out of 20 samples it is the slowest one, and a
+single pause of the machine would fail the run. --scale shrinks the
+dataset for quick runs; baselines only compare at one scale.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from utils import setup_django
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+BATCH_SIZE = 10000
+VOLUMES = {
+    'users': 10000,
+    'categories': 50,
+    'locations': 100,
+    'posts': 100000,
+    'comments': 1000000,
+}
+WORDS = (
+    'город река набережная осень парк музей концерт дорога поезд море '
+    'горы лес озеро закат кофе книга выставка театр рынок мост вечер'
+).split()
+AUTHOR_COMMENTS = 50
+
+
+def batched(rows, model):
+    """Inserts generated rows in batches, one transaction per batch."""
+    from django.db import transaction
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+
+
+def seed(volumes, seed_value):
+    """Fills the database and returns the objects the routes refer to."""
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from blog.comment_counts import comment_count_subquery
+    from blog.models import Category, Comment, Location, Post
+
+    rng = random.Random(seed_value)
+    User = get_user_model()
+    now = timezone.now()
+
+    def text(words):
+        return ' '.join(rng.choices(WORDS, k=words))
+
+    batched((User(username=f'user{i}', password='!')
+             for i in range(volumes['users'])), User)
+    batched((Category(title=f'Категория {i}', description=text(10),
+                      slug=f'cat-{i}', is_published=i % 10 != 9)
+             for i in range(volumes['categories'])), Category)
+    batched((Location(name=f'Место {i}', is_published=i % 20 != 19)
+             for i in range(volumes['locations'])), Location)
+    user_ids = list(User.objects.values_list('id', flat=True))
+    category_ids = list(Category.objects.filter(
+        is_published=True).values_list('id', flat=True))
+    location_ids = list(Location.objects.values_list('id', flat=True))
+
+    def post(**kwargs):
+        kind = rng.random()
+        defaults = {
+            'title': text(4).capitalize(),
+            'text': text(60),
+            'author_id': rng.choice(user_ids),
+            'category_id': rng.choice(category_ids),
+            'location_id': rng.choice(location_ids),
+            'is_published': kind > 0.05,
+            'pub_date': now + timedelta(minutes=rng.randint(1, 60 * 24 * 7))
+            if kind > 0.95 else
+            now - timedelta(minutes=rng.randint(1, 60 * 24 * 365 * 3)),
+        }
+        return Post(**{**defaults, **kwargs})
+
+    batched((post() for _ in range(volumes['posts'])), Post)
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    batched((Comment(post_id=rng.choice(post_ids),
+                     author_id=rng.choice(user_ids), text=text(12))
+             for _ in range(volumes['comments'])), Comment)
+
+    author = User.objects.create_user('bench-author', password='bench')
+    author_post = post(author_id=author.pk, is_published=True,
+                       pub_date=now - timedelta(days=1))
+    author_post.save()
+    Comment.objects.bulk_create(
+        Comment(post=author_post, author=author, text=text(12))
+        for _ in range(AUTHOR_COMMENTS))
+    Post.objects.update(comment_count=comment_count_subquery(Comment))
+    return {
+        'author': author,
+        'post': author_post,
+        'comment': author_post.comments.order_by('pk').first(),
+        'category': Category.objects.get(pk=author_post.category_id),
+        'other': User.objects.get(username='user0'),
+        'word': rng.choice(WORDS),
+    }
+
+
+def get_routes(objects):
+    """Returns (name, url name, kwargs, query, client, method) per route."""
+    post, comment = objects['post'], objects['comment']
+    post_kwargs = {'post_id': post.pk}
+    comment_kwargs = {'post_id': post.pk, 'comment_id': comment.pk}
+    return [
+        ('index', 'blog:index', {}, {}, 'anonymous', 'get'),
+        ('index (author)', 'blog:index', {}, {}, 'author', 'get'),
+        ('category_posts', 'blog:category_posts',
+         {'category_slug': objects['category'].slug}, {},
+         'anonymous', 'get'),
+        ('category_posts page 100', 'blog:category_posts',
+         {'category_slug': objects['category'].slug}, {'page': 100},
+         'anonymous', 'get'),
+        ('profile', 'blog:profile',
+         {'username': objects['other'].username}, {}, 'anonymous', 'get'),
+        ('profile (own)', 'blog:profile',
+         {'username': objects['author'].username}, {}, 'author', 'get'),
+        ('search', 'blog:search', {}, {'q': objects['word']},
+         'anonymous', 'get'),
+        ('post_detail', 'blog:post_detail', post_kwargs, {},
+         'anonymous', 'get'),
+        ('post_detail (author)', 'blog:post_detail', post_kwargs, {},
+         'author', 'get'),
+        ('post_comments', 'blog:post_comments', post_kwargs, {},
+         'anonymous', 'get'),
+        ('edit_profile', 'blog:edit_profile', {}, {}, 'author', 'get'),
+        ('create_post', 'blog:create_post', {}, {}, 'author', 'get'),
+        ('edit_post', 'blog:edit_post', post_kwargs, {}, 'author', 'get'),
+        ('delete_post', 'blog:delete_post', post_kwargs, {},
+         'author', 'get'),
+        ('add_comment', 'blog:add_comment', post_kwargs,
+         {'text': 'Комментарий'}, 'author', 'post'),
+        ('edit_comment', 'blog:edit_comment', comment_kwargs, {},
+         'author', 'get'),
+        ('delete_comment', 'blog:delete_comment', comment_kwargs, {},
+         'author', 'get'),
+        ('about', 'pages:about', {}, {}, 'anonymous', 'get'),
+        ('rules', 'pages:rules', {}, {}, 'anonymous', 'get'),
+    ]
+
+
+def check_coverage(routes):
+    """Fails when a blog or pages route has no benchmark."""
+    from blog.urls import urlpatterns as blog_urls
+    from pages.urls import urlpatterns as pages_urls
+
+    names = {f'blog:{url.name}' for url in blog_urls}
+    names |= {f'pages:{url.name}' for url in pages_urls}
+    missing = names - {route[1] for route in routes}
+    if missing:
+        sys.exit(f'Routes without a benchmark: {", ".join(sorted(missing))}')
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(client, method, url, query, repeat, warmup, cold=False):
+    """Returns queries, p50/p95 latency and bytes of warm requests.
+
+    Cold requests start from an empty Django cache, which shows the work
+    that the page, card and feed count caches hide.
+    """
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    request = getattr(client, method)
+    for _ in range(warmup):
+        request(url, query)
+    samples = []
+    for _ in range(repeat):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = request(url, query)
+            samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code in (200, 302), (url, response)
+    return {
+        'status': response.status_code,
+        'queries': len(queries),
+        'p50_ms': round(statistics.median(samples), 2),
+        'p95_ms': round(percentile(samples, 0.95), 2),
+        'bytes': len(response.content),
+    }
+
+
+def compare(results, baseline, tolerance, slack_ms):
+    """Returns the regressions of `results` against `baseline`."""
+    failures = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result['queries'] > expected['queries']:
+            failures.append(
+                f'{name}: {result["queries"]} queries, '
+                f'baseline {expected["queries"]}')
+        limit = expected['p50_ms'] * (1 + tolerance) + slack_ms
+        if result['p50_ms'] > limit:
+            failures.append(
+                f'{name}: p50 {result["p50_ms"]} ms, limit {limit:.2f} ms')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed relative p50 growth')
+    parser.add_argument('--slack-ms', type=float, default=5,
+                        help='allowed absolute p50 growth')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--check', action='store_true')
+    mode.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    volumes = {name: max(1, int(volume * args.scale))
+               for name, volume in VOLUMES.items()}
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(Path(tmp) / 'bench.sqlite3')
+        from django.conf import settings
+        from django.test import Client
+        from django.urls import reverse
+
+        settings.ALLOWED_HOSTS = ['testserver']
+        start = time.perf_counter()
+        objects = seed(volumes, args.seed)
+        print(f'seeded {volumes} in {time.perf_counter() - start:.0f} s')
+
+        clients = {'anonymous': Client(), 'author': Client()}
+        clients['author'].force_login(objects['author'])
+        routes = get_routes(objects)
+        check_coverage(routes)
+
+        results = {}
+        for name, url_name, kwargs, query, client, method in routes:
+            url = reverse(url_name, kwargs=kwargs)
+            for cold in (False, True) if method == 'get' else (False,):
+                key = f'{name} (cold)' if cold else name
+                results[key] = measure(
+                    clients[client], method, url, query,
+                    args.repeat, args.warmup, cold)
+                result = results[key]
+                print(f'{key:<29} {result["queries"]:>3} queries  '
+                      f'p50 {result["p50_ms"]:>8.2f} ms  '
+                      f'p95 {result["p95_ms"]:>8.2f} ms  '
+                      f'{result["bytes"]:>7} bytes')
+
+    report = {'volumes': volumes, 'seed': args.seed, 'routes': results}
+    if args.update_baseline:
+        args.baseline.write_text(
+            json.dumps(report, indent=2, ensure_ascii=False) + '\n')
+        print(f'baseline written to {args.baseline}')
+    elif args.check:
+        if not args.baseline.exists():
+            sys.exit(f'{args.baseline} not found, run --update-baseline')
+        baseline = json.loads(args.baseline.read_text())
+        if baseline['volumes'] != volumes:
+            sys.exit(f'baseline was recorded with {baseline["volumes"]}')
+        failures = compare(results, baseline['routes'],
+                           args.tolerance, args.slack_ms)
+        for failure in failures:
+            print(f'REGRESSION {failure}')
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Measures how fast PostForm rejects oversized image uploads.
+
+Posts an oversized file and a decompression bomb to the create view with
+the upload limits on and off and prints the best wall time of each; a 302
+status means the upload was accepted:
+
+    python benchmarks/upload_limits.py --megabytes 50
+"""
+import argparse
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+from utils import setup_django, timed
+
+DEFAULT_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+
+def make_bomb(side):
+    """Returns a small PNG that decodes to side × side pixels."""
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('L', (side, side)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--megabytes', type=int, default=50)
+    parser.add_argument('--bomb-side', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(Path(tmp) / 'bench.sqlite3')
+        from django.conf import settings
+        from django.contrib.auth import get_user_model
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.test import Client
+        from django.test.utils import override_settings
+        from PIL import Image
+
+        from blog.models import Category
+
+        settings.ALLOWED_HOSTS = ['testserver']
+        settings.MEDIA_ROOT = tmp
+        category = Category.objects.create(
+            title='Категория', description='', slug='bench')
+        client = Client()
+        client.force_login(
+            get_user_model().objects.create(username='bench'))
+
+        uploads = {
+            f'{args.megabytes} MB file': os.urandom(
+                args.megabytes * 1024 * 1024),
+            f'{args.bomb_side}×{args.bomb_side} PNG bomb': make_bomb(
+                args.bomb_side),
+        }
+        unlimited = override_settings(
+            FILE_UPLOAD_HANDLERS=DEFAULT_HANDLERS,
+            BLOG_IMAGE_MAX_BYTES=float('inf'),
+            BLOG_IMAGE_MAX_PIXELS=float('inf'))
+        Image.MAX_IMAGE_PIXELS = None
+
+        def post(content):
+            return client.post('/posts/create/', data={
+                'title': 'Пост',
+                'text': 'Текст',
+                'pub_date': '2000-01-01',
+                'category': category.pk,
+                'image': SimpleUploadedFile('photo.png', content),
+            }).status_code
+
+        for name, content in uploads.items():
+            print(f'== {name}')
+            limited = timed(lambda: post(content))
+            print(f'limits on:  {limited:.2f} ms, status {post(content)}')
+            with unlimited:
+                baseline = timed(lambda: post(content))
+                print(f'limits off: {baseline:.2f} ms, '
+                      f'status {post(content)}\n')
+
+
+if __name__ == '__main__':
+    main()
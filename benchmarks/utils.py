@@ -0,0 +1,43 @@
+"""Shared helpers for the standalone benchmark scripts."""
+import os
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'blogicum'
+
+
+def setup_django(db_path):
+    """Points the project at a separate SQLite file and a cache directory
+    next to it, then migrates the database.
+    """
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = str(db_path)
+    # the project cache directory would outlive the database of the run
+    settings.CACHES['default']['LOCATION'] = str(
+        Path(db_path).parent / 'cache')
+    settings.INSTALLED_APPS = [
+        app for app in settings.INSTALLED_APPS if app != 'debug_toolbar']
+    settings.MIDDLEWARE = [
+        middleware for middleware in settings.MIDDLEWARE
+        if not middleware.startswith('debug_toolbar')]
+    settings.DEBUG = False
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def timed(func, repeat=5):
+    """Returns the best wall time of `func` in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
@@ -1,6 +1,59 @@
+from django import forms
 from django.contrib import admin
+from django.forms.models import ModelChoiceIterator
 
-from .models import Post, Category, Location, Comment
+from .models import (Post, Category, Location, Comment, ImageJob,
+                     PostSearchIndex)
+from .bulk import (delete_comments, delete_post_relations, delete_posts,
+                   set_published)
+from .search import to_match_query
+
+
+@admin.action(
+    description='Опубликовать выбранные одним запросом',
+    permissions=('change',))
+def publish_selected(modeladmin, request, queryset):
+    count = set_published(queryset, True)
+    modeladmin.message_user(request, f'Опубликовано записей: {count}.')
+
+
+@admin.action(
+    description='Снять с публикации выбранные одним запросом',
+    permissions=('change',))
+def unpublish_selected(modeladmin, request, queryset):
+    count = set_published(queryset, False)
+    modeladmin.message_user(request, f'Снято с публикации записей: {count}.')
+
+
+@admin.action(
+    description='Удалить выбранные одним запросом, без подтверждения',
+    permissions=('delete',))
+def bulk_delete_selected(modeladmin, request, queryset):
+    count = modeladmin.bulk_delete(queryset)
+    modeladmin.message_user(request, f'Удалено записей: {count}.')
+
+
+class SharedChoicesIterator(ModelChoiceIterator):
+    """Evaluates the choices once for all the forms copied from a field."""
+
+    def __iter__(self):
+        if not self.field.shared_choices:
+            self.field.shared_choices.extend(super().__iter__())
+        return iter(self.field.shared_choices)
+
+    def __len__(self):
+        return len(list(self))
+
+
+class SharedChoicesField(forms.ModelChoiceField):
+    """Keeps list_editable selects at one query per changelist page."""
+
+    iterator = SharedChoicesIterator
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # form copies are shallow, so every row shares this list
+        self.shared_choices = []
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,19 +69,50 @@ class PostAdmin(admin.ModelAdmin):
         'category',
     )
     list_per_page = 15
-    search_fields = (
-        'title',
-        'text',
+    list_select_related = (
         'author',
+        'category',
+    )
+    show_full_result_count = False
+    search_fields = (
+        '=author__username',
     )
     list_filter = (
+        'is_published',
         'category',
+    )
+    autocomplete_fields = (
         'author',
         'location',
     )
     list_display_links = (
         'title',
     )
+    actions = (
+        publish_selected,
+        unpublish_selected,
+        bulk_delete_selected,
+    )
+
+    def bulk_delete(self, queryset):
+        return delete_posts(queryset)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Adds full-text matches to the exact author lookup."""
+        by_author, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term)
+        match = to_match_query(search_term)
+        if not match:
+            return by_author, may_have_duplicates
+        matches = PostSearchIndex.objects.filter(
+            document__match=match).values('post')
+        return (by_author | queryset.filter(pk__in=matches),
+                may_have_duplicates)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.list_editable:
+            kwargs.setdefault('form_class', SharedChoicesField)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
 class CategoryAdmin(admin.ModelAdmin):
@@ -49,6 +133,14 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display_links = (
         'title',
     )
+    actions = (
+        publish_selected,
+        unpublish_selected,
+        bulk_delete_selected,
+    )
+
+    def bulk_delete(self, queryset):
+        return delete_post_relations(queryset, 'category')
 
 
 class LocationAdmin(admin.ModelAdmin):
@@ -70,6 +162,14 @@ class LocationAdmin(admin.ModelAdmin):
     list_display_links = (
         'name',
     )
+    actions = (
+        publish_selected,
+        unpublish_selected,
+        bulk_delete_selected,
+    )
+
+    def bulk_delete(self, queryset):
+        return delete_post_relations(queryset, 'location')
 
 
 class CommentAdmin(admin.ModelAdmin):
@@ -80,13 +180,52 @@ class CommentAdmin(admin.ModelAdmin):
     )
 
     list_per_page = 15
+    list_select_related = (
+        'post',
+        'author',
+    )
+    show_full_result_count = False
     search_fields = (
+        '=author__username',
+    )
+    autocomplete_fields = (
         'post',
         'author',
     )
     list_display_links = (
         'post',
     )
+    actions = (
+        bulk_delete_selected,
+    )
+
+    def bulk_delete(self, queryset):
+        return delete_comments(queryset)
+
+
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'image_name',
+        'post',
+        'status',
+        'attempts',
+        'run_after',
+    )
+    list_per_page = 15
+    list_filter = (
+        'status',
+    )
+    list_select_related = (
+        'post',
+    )
+    readonly_fields = (
+        'post',
+        'image_name',
+        'attempts',
+        'locked_at',
+        'last_error',
+        'created_at',
+    )
 
 
 admin.site.empty_value_display = 'Не задано'
@@ -96,3 +235,4 @@ admin.site.register(Category, CategoryAdmin)
 admin.site.register(Location, LocationAdmin)
 admin.site.register(Post, PostAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(ImageJob, ImageJobAdmin)
@@ -0,0 +1,92 @@
+"""Set-based moderation helpers used by the admin actions.
+
+QuerySet.update() and raw deletes skip model signals, so every helper
+touches Post.updated_at where rows survive and invalidates the caches the
+signals would have invalidated.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import (PAGE_GLOBAL_TAG, invalidate_all_feed_counts,
+                      invalidate_page_tags, invalidate_post_cards)
+from .comment_counts import comment_count_subquery
+from .images import release_image
+from .lookups import clear_table_cache
+from .models import Comment, ImageJob, Post
+
+
+def invalidate_after_bulk_change(*card_models):
+    """Drops every feed total and cached page, plus the given card kinds."""
+    invalidate_all_feed_counts()
+    for model_name in card_models:
+        invalidate_post_cards(model_name)
+        clear_table_cache(model_name)
+    invalidate_page_tags(PAGE_GLOBAL_TAG)
+
+
+def set_published(queryset, is_published):
+    """Publishes or hides the rows in one UPDATE, returns how many changed.
+
+    Post rows get a fresh updated_at, which also renews their cards.
+    """
+    values = {'is_published': is_published}
+    if queryset.model is Post:
+        values['updated_at'] = timezone.now()
+    with transaction.atomic():
+        count = queryset.exclude(is_published=is_published).update(**values)
+    if count:
+        invalidate_after_bulk_change(
+            *(() if queryset.model is Post
+              else (queryset.model._meta.model_name,)))
+    return count
+
+
+def raw_delete(queryset):
+    """Deletes the rows with a single DELETE, without collecting them."""
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_posts(queryset):
+    """Deletes posts with their comments and jobs, returns the post count.
+
+    The FTS5 index is cleaned by its trigger; images are released once the
+    transaction commits.
+    """
+    with transaction.atomic():
+        images = set(queryset.exclude(image='').values_list(
+            'image', flat=True))
+        pks = queryset.values('pk')
+        raw_delete(Comment.objects.filter(post__in=pks))
+        raw_delete(ImageJob.objects.filter(post__in=pks))
+        count = raw_delete(Post.objects.filter(pk__in=pks))
+        for name in images:
+            transaction.on_commit(partial(release_image, name))
+    if count:
+        invalidate_after_bulk_change()
+    return count
+
+
+def delete_comments(queryset):
+    """Deletes comments and recounts them on the affected posts."""
+    with transaction.atomic():
+        post_pks = set(queryset.values_list('post_id', flat=True))
+        count = raw_delete(queryset)
+        Post.objects.filter(pk__in=post_pks).update(
+            comment_count=comment_count_subquery(Comment),
+            updated_at=timezone.now())
+    if count:
+        invalidate_after_bulk_change()
+    return count
+
+
+def delete_post_relations(queryset, field_name):
+    """Deletes categories or locations, detaching their posts first."""
+    with transaction.atomic():
+        Post.objects.filter(**{f'{field_name}__in': queryset}).update(
+            **{field_name: None, 'updated_at': timezone.now()})
+        count = raw_delete(queryset)
+    if count:
+        invalidate_after_bulk_change(field_name)
+    return count
@@ -0,0 +1,195 @@
+import hashlib
+import time
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.db.models import Min
+from django.utils import timezone
+
+from core.metrics import metrics
+from .models import Post
+
+FEED_COUNT_TIMEOUT = 60 * 60
+FEED_COUNT_GENERATION_KEY = 'feed_count:generation'
+POST_CARD_TIMEOUT = 60 * 60 * 24
+POST_CARD_GENERATION_KEYS = {
+    'category': 'post_card:generation:category',
+    'location': 'post_card:generation:location',
+}
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+PAGE_GLOBAL_TAG = 'global'
+
+post_card_stats = Counter()
+
+
+def new_version():
+    """Returns the current time in microseconds as a version.
+
+    Versions never repeat, so a bump needs no atomic increment, and a
+    version key that the cache has culled comes back with a number no
+    existing entry was built under.
+    """
+    return time.time_ns() // 1000
+
+
+def get_versions(keys):
+    """Returns the versions stored under `keys`, starting missing ones."""
+    keys = list(keys)
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        version = new_version()
+        for key in missing:
+            cache.add(key, version, None)
+        stored = cache.get_many(missing)
+        versions.update(
+            {key: stored.get(key, version) for key in missing})
+    return versions
+
+
+def bump_generation(key):
+    """Invalidates every cache entry built on the generation `key`."""
+    cache.set(key, new_version(), None)
+
+
+def get_feed_count_generation():
+    return get_versions(
+        [FEED_COUNT_GENERATION_KEY])[FEED_COUNT_GENERATION_KEY]
+
+
+def feed_count_key(*scope):
+    """Returns the cache key of a feed total, e.g. ('category', slug)."""
+    parts = ':'.join(str(part) for part in scope)
+    return f'feed_count:{get_feed_count_generation()}:{parts}'
+
+
+def author_feed_count_keys(author_id):
+    return [feed_count_key('author', author_id, visibility)
+            for visibility in ('all', 'public')]
+
+
+def invalidate_post_feed_counts(category_slugs, author_id):
+    """Drops the totals of every feed a post was or is listed in."""
+    keys = [feed_count_key('index'), *author_feed_count_keys(author_id)]
+    keys += [feed_count_key('category', slug) for slug in category_slugs]
+    cache.delete_many(keys)
+
+
+def invalidate_all_feed_counts():
+    """Drops every feed total at once, e.g. after a category toggle."""
+    bump_generation(FEED_COUNT_GENERATION_KEY)
+
+
+def post_card_key(post_id):
+    return f'post_card:{post_id}'
+
+
+def get_post_card_generations():
+    """Returns the generations of the related models a card renders."""
+    generations = get_versions(POST_CARD_GENERATION_KEYS.values())
+    return tuple(generations.get(key, 0)
+                 for key in POST_CARD_GENERATION_KEYS.values())
+
+
+def invalidate_post_card(post_id):
+    cache.delete(post_card_key(post_id))
+
+
+def invalidate_post_cards(model_name):
+    """Drops every card showing a category or location."""
+    bump_generation(POST_CARD_GENERATION_KEYS[model_name])
+
+
+def seconds_until_next_publication(default):
+    """Limits a timeout so it ends when the next scheduled post goes live."""
+    now = timezone.now()
+    next_pub_date = Post.objects.filter(
+        is_published=True,
+        pub_date__gt=now).aggregate(
+            next_pub_date=Min('pub_date'))['next_pub_date']
+    if next_pub_date is None:
+        return default
+    return max(1, min(default, int((next_pub_date - now).total_seconds())))
+
+
+def page_tag_key(tag):
+    return f'page_tag:{tag}'
+
+
+def invalidate_page_tags(*tags):
+    """Expires every cached page rendered with one of the `tags`.
+
+    The new version is the bump time in microseconds, so conditional
+    responses can also use it as a modification time.
+    """
+    version = new_version()
+    cache.set_many({page_tag_key(tag): version for tag in tags}, None)
+
+
+def page_tag_modified(version):
+    """Returns the time a page tag was last bumped, or None."""
+    if not version:
+        return None
+    return datetime.fromtimestamp(version / 1_000_000, tz=timezone.utc)
+
+
+def post_page_tags(post_id, category_slugs, author_username):
+    """Returns the tags of every page a post is shown on."""
+    return (
+        f'post:{post_id}',
+        'feed:index',
+        f'feed:author:{author_username}',
+        *(f'feed:category:{slug}' for slug in category_slugs),
+    )
+
+
+def page_cache_key(request, tags):
+    versions = get_versions(page_tag_key(tag) for tag in tags)
+    version = ':'.join(str(versions.get(page_tag_key(tag), 0))
+                       for tag in tags)
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{path}:{version}'
+
+
+def is_cacheable_page(request, response):
+    """Only plain 200 pages without CSRF tokens or cookies are shared."""
+    return (response.status_code == 200
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED'))
+
+
+def cache_anonymous_page(get_tags):
+    """Caches a GET view for anonymous users under tag-versioned keys.
+
+    `get_tags` receives the view kwargs and returns the tags the page
+    depends on; bumping any of them with `invalidate_page_tags` expires the
+    page. Entries also expire when the next scheduled post goes live.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            tags = (PAGE_GLOBAL_TAG, *get_tags(**kwargs))
+            key = page_cache_key(request, tags)
+            cached = cache.get(key)
+            metrics.inc('blogicum_cache_requests_total', cache='page',
+                        result='miss' if cached is None else 'hit')
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            if is_cacheable_page(request, response):
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type']),
+                    seconds_until_next_publication(PAGE_CACHE_TIMEOUT))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,18 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def comment_count_subquery(comment_model):
+    """Returns a subquery counting comments of the outer post.
+
+    The model is passed in so that migrations can use their historical one.
+    """
+    return Coalesce(
+        Subquery(
+            comment_model.objects.filter(
+                post=OuterRef('pk')).order_by().values(
+                    'post').annotate(
+                        total=Count('pk')).values(
+                            'total'),
+            output_field=IntegerField()),
+        0)
@@ -0,0 +1,70 @@
+import hashlib
+
+from django.db.models import Subquery
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .caching import (PAGE_GLOBAL_TAG, get_versions, page_tag_key,
+                      page_tag_modified)
+from .models import Post
+
+
+def feed_timestamps(**kwargs):
+    """Returns the newest post change and the newest live pub_date."""
+    live = Post.objects.filter(
+        is_published=True,
+        pub_date__lte=timezone.now()).order_by(
+            '-pub_date').values('pub_date')[:1]
+    return Post.objects.order_by(
+        '-updated_at').annotate(
+            live=Subquery(live)).values_list(
+                'updated_at', 'live').first()
+
+
+def post_timestamps(post_id, **kwargs):
+    """Returns the post change time, which comment changes also touch."""
+    return Post.objects.filter(pk=post_id).values_list('updated_at').first()
+
+
+def conditional_page(get_timestamps, get_tags):
+    """Answers repeat GETs with 304 using one lightweight query.
+
+    The ETag combines the newest relevant timestamps, the viewer and the
+    page cache tag versions, which also change on deletes. Last-Modified is
+    the newest of the timestamps and the tag bump times, so post deletes
+    and category or location toggles move it too. It is only sent to
+    anonymous users because the HTML differs per user.
+    """
+    def get_validators(request, **kwargs):
+        if not hasattr(request, '_blog_validators'):
+            timestamps = get_timestamps(**kwargs)
+            tags = (PAGE_GLOBAL_TAG, *get_tags(**kwargs))
+            versions = get_versions(page_tag_key(tag) for tag in tags)
+            last_modified = None
+            if timestamps:
+                last_modified = max(
+                    (value for value in (
+                        *timestamps,
+                        *map(page_tag_modified, versions.values()))
+                     if value is not None),
+                    default=None)
+            raw = ':'.join([
+                str(last_modified),
+                str(request.user.pk),
+                *(str(versions.get(page_tag_key(tag), 0)) for tag in tags),
+            ])
+            request._blog_validators = (
+                last_modified,
+                hashlib.md5(raw.encode()).hexdigest()
+                if last_modified is not None else None)
+        return request._blog_validators
+
+    def etag(request, *args, **kwargs):
+        return get_validators(request, **kwargs)[1]
+
+    def last_modified(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return get_validators(request, **kwargs)[0]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,188 @@
+"""Streaming export and import of the blog tables.
+
+Exports are JSON Lines in the dumpdata object format, written table by
+table in foreign key order. Imports read such files or db.json-style JSON
+arrays object by object and insert them in batches, so memory stays
+bounded by the batch size whatever the size of the dump.
+"""
+import datetime
+import json
+
+from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.serializers.python import Deserializer
+from django.db import connections, transaction
+
+from .models import Category, Comment, Location, Post
+
+DUMP_MODELS = (Category, Location, get_user_model(), Post, Comment)
+READ_SIZE = 64 * 1024
+SEPARATORS = ' \t\r\n,'
+
+_decoder = json.JSONDecoder()
+
+
+class DumpJSONEncoder(DjangoJSONEncoder):
+    """Keeps microseconds, which DjangoJSONEncoder cuts to milliseconds."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            value = o.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return super().default(o)
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def concrete_field_names(model):
+    """Returns the fields to dump; many-to-many relations are left out."""
+    return [field.name for field in model._meta.local_concrete_fields
+            if not field.primary_key]
+
+
+def export_model(model, stream, batch_size):
+    """Writes every row of `model` to `stream`, returns the row count."""
+    fields = concrete_field_names(model)
+    rows = model._default_manager.order_by('pk').iterator(
+        chunk_size=batch_size)
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            serializers.serialize('jsonl', batch, fields=fields,
+                                  stream=stream, cls=DumpJSONEncoder)
+            total += len(batch)
+            batch = []
+    if batch:
+        serializers.serialize('jsonl', batch, fields=fields,
+                              stream=stream, cls=DumpJSONEncoder)
+        total += len(batch)
+    return total
+
+
+def iter_dump_objects(stream):
+    """Yields the objects of a JSON array or JSON Lines dump one by one.
+
+    Only the current object and one read block are kept in memory.
+    """
+    buffer, pos, eof = '', 0, False
+    in_array = None
+    while True:
+        while pos < len(buffer) and buffer[pos] in SEPARATORS:
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                return
+            buffer, pos = stream.read(READ_SIZE), 0
+            eof = not buffer
+            continue
+        if in_array is None:
+            in_array = buffer[pos] == '['
+            pos += in_array
+            continue
+        if in_array and buffer[pos] == ']':
+            return
+        try:
+            obj, pos = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # the object continues in the next block
+            chunk = stream.read(READ_SIZE)
+            buffer, pos = buffer[pos:] + chunk, 0
+            eof = not chunk
+            continue
+        yield obj
+
+
+class DumpLoader:
+    """Inserts dumped objects in batches of raw rows.
+
+    Rows are inserted with raw=True, like loaddata does, so stored
+    created_at and updated_at values survive instead of being replaced by
+    auto_now. Foreign keys are only checked once everything is loaded,
+    because db.json lists posts before their authors.
+    """
+
+    def __init__(self, batch_size, using='default', on_flush=None):
+        self.batch_size = batch_size
+        self.using = using
+        self.on_flush = on_flush
+        self.models = {model_label(model): model for model in DUMP_MODELS}
+        self.many_to_many = {
+            label: {field.name for field in model._meta.many_to_many}
+            for label, model in self.models.items()}
+        self.auto_now = {
+            label: [field for field in model._meta.local_concrete_fields
+                    if getattr(field, 'auto_now', False)
+                    or getattr(field, 'auto_now_add', False)]
+            for label, model in self.models.items()}
+        self.pending = {label: [] for label in self.models}
+        self.loaded = dict.fromkeys(self.models, 0)
+        self.skipped = 0
+
+    def add(self, data):
+        label = data.get('model', '').lower()
+        if label not in self.models:
+            self.skipped += 1
+            return
+        # many-to-many values of users point at unexported tables
+        data = {**data, 'fields': {
+            name: value for name, value in data.get('fields', {}).items()
+            if name not in self.many_to_many[label]}}
+        deserialized = next(Deserializer(
+            [data], using=self.using, ignorenonexistent=True))
+        obj = deserialized.object
+        for field in self.auto_now[label]:
+            # older dumps predate Post.updated_at
+            if getattr(obj, field.attname) is None:
+                field.pre_save(obj, add=True)
+        pending = self.pending[label]
+        pending.append(obj)
+        if len(pending) >= self.batch_size:
+            self.flush(label)
+
+    def flush(self, label):
+        objs = self.pending[label]
+        if not objs:
+            return
+        model = self.models[label]
+        fields = model._meta.local_concrete_fields
+        connection = connections[self.using]
+        size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+        with transaction.atomic(using=self.using):
+            for start in range(0, len(objs), size):
+                model._base_manager._insert(
+                    objs[start:start + size], fields=fields, raw=True,
+                    using=self.using)
+        self.loaded[label] += len(objs)
+        self.pending[label] = []
+        if self.on_flush is not None:
+            self.on_flush(label, self.loaded[label])
+
+    def load(self, objects):
+        """Loads `objects` and returns the row counts per model label."""
+        connection = connections[self.using]
+        with connection.constraint_checks_disabled():
+            for data in objects:
+                self.add(data)
+            for label in self.pending:
+                self.flush(label)
+        connection.check_constraints(table_names=[
+            model._meta.db_table for model in DUMP_MODELS])
+        self.reset_sequences()
+        return self.loaded
+
+    def reset_sequences(self):
+        connection = connections[self.using]
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), DUMP_MODELS)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -3,6 +3,7 @@ from django import forms
 from django.contrib.auth import get_user_model
 
 from .models import Post, Comment
+from .uploads import LimitedImageField
 
 User = get_user_model()
 
@@ -12,6 +13,7 @@ class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         exclude = ('author',)
+        field_classes = {'image': LimitedImageField}
         widgets = {'pub_date': forms.DateInput(attrs={'type': 'date'})}
 
     def clean_first_name(self):
@@ -0,0 +1,73 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import Post
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_QUALITY = 85
+CARD_IMAGE_WIDTH = 640
+
+
+def variant_name(name, width):
+    """Returns the storage name of a resized copy of `name`."""
+    root, ext = os.path.splitext(name)
+    return f'{root}_{width}w{ext}'
+
+
+def generate_variants(image_file):
+    """Saves downscaled copies next to the original, returns their widths.
+
+    Widths that are not smaller than the original are skipped, so small
+    uploads are served as is.
+    """
+    storage = image_file.storage
+    widths = []
+    with storage.open(image_file.name) as source, Image.open(source) as image:
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        for width in VARIANT_WIDTHS:
+            if width >= image.width:
+                break
+            variant = image.copy()
+            variant.thumbnail((width, image.height))
+            buffer = BytesIO()
+            variant.save(buffer, format=image_format,
+                         quality=VARIANT_QUALITY, optimize=True)
+            name = variant_name(image_file.name, width)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(buffer.getvalue()))
+            widths.append(width)
+    return widths
+
+
+def variant_url(image_file, width):
+    return image_file.storage.url(variant_name(image_file.name, width))
+
+
+def release_image(name):
+    """Deletes a shared image and its copies once no post refers to it.
+
+    The files are moved aside before a second check, so a post that
+    reused the image and committed in the meantime gets them back.
+    """
+    if not name or Post.objects.filter(image=name).exists():
+        return
+    storage = Post._meta.get_field('image').storage
+    moved = []
+    for stored in (name, *(variant_name(name, w) for w in VARIANT_WIDTHS)):
+        if storage.exists(stored):
+            path = storage.path(stored)
+            os.replace(path, f'{path}.released')
+            moved.append(path)
+    keep = Post.objects.filter(image=name).exists()
+    for path in moved:
+        if keep:
+            os.replace(f'{path}.released', path)
+        else:
+            os.remove(f'{path}.released')
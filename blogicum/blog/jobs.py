@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .images import generate_variants
+from .models import ImageJob, Post
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(seconds=30)
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue_image_job(post):
+    """Drops stale variants and queues the post image for processing.
+
+    Pages serve the original image while `image_variants` is empty.
+    """
+    post.image_variants = []
+    post.save(update_fields=('image_variants',))
+    if post.image:
+        ImageJob.objects.create(post=post, image_name=post.image.name)
+
+
+def requeue_stale_jobs():
+    """Returns jobs abandoned by a crashed worker to the queue.
+
+    A job that has used up its attempts fails instead, so an image that
+    kills the worker is not retried forever.
+    """
+    stale = ImageJob.objects.filter(
+        status=ImageJob.RUNNING,
+        locked_at__lt=timezone.now() - STALE_AFTER)
+    stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=ImageJob.FAILED, locked_at=None,
+        last_error='The worker stopped while processing the image.')
+    return stale.update(status=ImageJob.PENDING, locked_at=None)
+
+
+def claim_next_job():
+    """Marks the oldest due job as running, safe for several workers."""
+    now = timezone.now()
+    due = ImageJob.objects.filter(
+        status=ImageJob.PENDING, run_after__lte=now).order_by(
+            'run_after', 'pk').values_list('pk', flat=True)
+    for pk in due[:10]:
+        claimed = ImageJob.objects.filter(
+            pk=pk, status=ImageJob.PENDING).update(
+                status=ImageJob.RUNNING, locked_at=now,
+                attempts=F('attempts') + 1)
+        if claimed:
+            return ImageJob.objects.select_related('post').get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """Processes one claimed job, scheduling a retry when it fails."""
+    post = Post.objects.filter(pk=job.post_id).first()
+    if post is None or post.image.name != job.image_name:
+        # the post is gone or a newer upload has its own job
+        return finish_job(job, ImageJob.DONE)
+    try:
+        widths = generate_variants(post.image)
+    except Exception as error:
+        # Pillow's DecompressionBombError is not an OSError, and admin
+        # uploads skip the form checks
+        if job.attempts >= MAX_ATTEMPTS:
+            return finish_job(job, ImageJob.FAILED, error=error)
+        return finish_job(
+            job, ImageJob.PENDING, error=error,
+            run_after=timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1))
+    post.image_variants = widths
+    post.save(update_fields=('image_variants',))
+    return finish_job(job, ImageJob.DONE)
+
+
+def finish_job(job, status, error=None, run_after=None):
+    job.status = status
+    job.locked_at = None
+    if error is not None:
+        job.last_error = str(error)
+    if run_after is not None:
+        job.run_after = run_after
+    job.save(update_fields=(
+        'status', 'locked_at', 'last_error', 'run_after'))
+    return job
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from .caching import POST_CARD_GENERATION_KEYS, get_versions
+from .models import Category, Location, Post
+
+CHECK_INTERVAL = 1
+
+
+class TableCache:
+    """Process-local copy of a small table, shared by all requests.
+
+    The post card generation of the model doubles as the table version:
+    every worker compares it with its copy at most once per CHECK_INTERVAL
+    seconds and reloads the table after another worker has bumped it. The
+    worker that made the change calls clear() and reloads at once.
+    """
+
+    def __init__(self, model, slug_field=None):
+        self.model = model
+        self.slug_field = slug_field
+        self.generation_key = POST_CARD_GENERATION_KEYS[
+            model._meta.model_name]
+        self._lock = threading.Lock()
+        self._state = None
+        self._checked_at = 0
+
+    def clear(self):
+        self._state = None
+
+    def _load(self):
+        now = time.monotonic()
+        state = self._state
+        if state is not None and now - self._checked_at < CHECK_INTERVAL:
+            return state
+        with self._lock:
+            # read the version first, so a concurrent bump forces a reload
+            generation = get_versions(
+                [self.generation_key])[self.generation_key]
+            state = self._state
+            if state is None or state[0] != generation:
+                rows = list(self.model.objects.all())
+                by_slug = {}
+                if self.slug_field:
+                    by_slug = {getattr(row, self.slug_field): row
+                               for row in rows}
+                state = (
+                    generation,
+                    {row.pk: row for row in rows},
+                    by_slug,
+                    frozenset(row.pk for row in rows if row.is_published),
+                )
+                self._state = state
+            self._checked_at = now
+        return state
+
+    def get(self, pk):
+        return self._load()[1].get(pk)
+
+    def get_published_by_slug(self, slug):
+        row = self._load()[2].get(slug)
+        return row if row is not None and row.is_published else None
+
+    def published_ids(self):
+        return self._load()[3]
+
+
+categories = TableCache(Category, slug_field='slug')
+locations = TableCache(Location)
+TABLE_CACHES = {'category': categories, 'location': locations}
+
+
+def clear_table_cache(model_name):
+    if model_name in TABLE_CACHES:
+        TABLE_CACHES[model_name].clear()
+
+
+def attach_relations(post):
+    """Fills post.category and post.location from the table caches.
+
+    Rows this worker has not seen yet are left to the usual lazy query.
+    """
+    for field_name, table in TABLE_CACHES.items():
+        field = Post._meta.get_field(field_name)
+        if field.is_cached(post):
+            continue
+        pk = getattr(post, field.attname)
+        row = table.get(pk) if pk is not None else None
+        if pk is None or row is not None:
+            field.set_cached_value(post, row)
+    return post
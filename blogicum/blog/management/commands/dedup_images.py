@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from blog.jobs import enqueue_image_job
+from blog.models import Post
+from blog.storage import is_content_addressed
+
+
+class Command(BaseCommand):
+    help = ('Moves post images uploaded before content addressing to '
+            'hashed names, storing identical files once.')
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        posts = Post.objects.exclude(image='').select_related(
+            'author').order_by('pk')
+        moved = duplicates = missing = freed = 0
+        for post in posts.iterator():
+            name = post.image.name
+            if is_content_addressed(name):
+                continue
+            if not storage.exists(name):
+                missing += 1
+                self.stderr.write(f'Post {post.pk}: {name} is missing.')
+                continue
+            with storage.open(name) as content:
+                if storage.exists(storage.hashed_name(name, content)):
+                    duplicates += 1
+                    freed += content.size
+                hashed = storage.save(name, content)
+            post.image.name = hashed
+            # releases the old file and its copies once unreferenced
+            post.save(update_fields=('image',))
+            enqueue_image_job(post)
+            moved += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Images moved: {moved}, duplicates: {duplicates}, '
+            f'missing: {missing}, bytes freed: {freed}.'))
@@ -0,0 +1,40 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.dumps import DUMP_MODELS, export_model
+
+
+class Command(BaseCommand):
+    help = ('Streams categories, locations, users, posts and comments to '
+            'a JSON Lines dump in foreign key order.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            '-o',
+            help='File to write; standard output when omitted.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows fetched and serialized at a time.')
+
+    def handle(self, *args, **options):
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                self.export(stream, options['batch_size'], self.stdout)
+        else:
+            # serializers write partial lines, which OutputWrapper would
+            # terminate
+            self.export(sys.stdout, options['batch_size'], self.stderr)
+
+    def export(self, stream, batch_size, log):
+        for model in DUMP_MODELS:
+            started = time.perf_counter()
+            total = export_model(model, stream, batch_size)
+            elapsed = time.perf_counter() - started
+            log.write(
+                f'{model._meta.label_lower}: {total} rows in '
+                f'{elapsed:.1f} s, {total / max(elapsed, 1e-6):.0f} rows/s.')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import generate_variants
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Generates resized copies of post images uploaded earlier.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate copies for posts that already have them.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only('id', 'image')
+        if not options['force']:
+            posts = posts.filter(image_variants=[])
+        processed = failed = 0
+        for post in posts.iterator():
+            try:
+                post.image_variants = generate_variants(post.image)
+            except Exception as error:
+                # one bad legacy image, e.g. a DecompressionBombError,
+                # must not stop the backfill
+                failed += 1
+                self.stderr.write(f'Post {post.pk}: {error}')
+                continue
+            post.save(update_fields=('image_variants',))
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Image variants generated: {processed} posts, failed: {failed}.'))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.bulk import invalidate_after_bulk_change
+from blog.caching import POST_CARD_GENERATION_KEYS
+from blog.comment_counts import comment_count_subquery
+from blog.dumps import DumpLoader, iter_dump_objects
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = ('Loads a JSON Lines dump or a db.json-style fixture into the '
+            'blog tables in batches, without reading it into memory.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Dump to load.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows per table inserted in one transaction.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        started = time.perf_counter()
+        loader = DumpLoader(options['batch_size'], on_flush=self.progress)
+        with open(options['path'], encoding='utf-8') as stream:
+            loaded = loader.load(iter_dump_objects(stream))
+        if loaded['blog.comment']:
+            Post.objects.update(comment_count=comment_count_subquery(Comment))
+        invalidate_after_bulk_change(*POST_CARD_GENERATION_KEYS)
+        elapsed = time.perf_counter() - started
+        total = sum(loaded.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {total} rows in {elapsed:.1f} s '
+            f'({total / max(elapsed, 1e-6):.0f} rows/s), '
+            f'skipped {loader.skipped} objects of other models.'))
+
+    def progress(self, label, loaded):
+        if self.verbosity > 1:
+            self.stdout.write(f'  {label}: {loaded}')
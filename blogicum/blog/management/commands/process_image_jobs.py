@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.jobs import claim_next_job, requeue_stale_jobs, run_job
+from blog.models import ImageJob
+
+
+class Command(BaseCommand):
+    help = 'Processes queued post images in the background.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling.')
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5,
+            help='Seconds to wait between polls of an empty queue.')
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        while True:
+            requeue_stale_jobs()
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            job = run_job(job)
+            if job.status == ImageJob.DONE:
+                processed += 1
+            else:
+                failed += 1
+                self.stderr.write(
+                    f'Job {job.pk} ({job.get_status_display()}): '
+                    f'{job.last_error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Image jobs processed: {processed}, failed: {failed}.'))
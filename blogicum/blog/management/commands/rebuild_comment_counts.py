@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.comment_counts import comment_count_subquery
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Recalculates the stored comment counters of all posts.'
+
+    def handle(self, *args, **options):
+        updated = Post.objects.update(
+            comment_count=comment_count_subquery(Comment))
+        self.stdout.write(
+            self.style.SUCCESS(f'Comment counters rebuilt: {updated} posts.'))
@@ -0,0 +1,165 @@
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog.bulk import invalidate_after_bulk_change
+from blog.caching import POST_CARD_GENERATION_KEYS
+from blog.comment_counts import comment_count_subquery
+from blog.models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+WORDS = (
+    'город река набережная осень парк музей концерт дорога поезд море '
+    'горы лес озеро закат кофе книга выставка театр рынок мост вечер '
+    'утро python django ужин поход фото друзья дождь снег лето'
+).split()
+
+
+def last_pk(model):
+    return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+class Command(BaseCommand):
+    help = ('Fills the database with synthetic users, categories, '
+            'locations, posts and comments for load testing.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--locations', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Same seed, same generated data.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per INSERT; every batch is its own transaction.')
+        parser.add_argument(
+            '--unpublished',
+            type=float,
+            default=0.05,
+            help='Share of hidden posts, categories and locations.')
+        parser.add_argument(
+            '--scheduled',
+            type=float,
+            default=0.05,
+            help='Share of posts with a publication date in the future.')
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365 * 3,
+            help='Published posts are spread over this many past days.')
+        parser.add_argument(
+            '--prefix',
+            default='load',
+            help='Prefix of generated usernames and category slugs.')
+        parser.add_argument(
+            '--password',
+            help='Password of generated users; unusable when omitted.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.verbosity = options['verbosity']
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        prefix = f'{options["prefix"]}-{options["seed"]}'
+        password = make_password(options['password'])
+        unpublished = options['unpublished']
+        started = time.perf_counter()
+
+        first_user, first_location = last_pk(User), last_pk(Location)
+        self.insert(User, (
+            User(username=f'{prefix}-user-{i}', password=password)
+            for i in range(options['users'])))
+        self.insert(Category, (
+            Category(title=f'Категория {i}', description=self.text(10),
+                     slug=f'{prefix}-category-{i}',
+                     is_published=self.rng.random() >= unpublished)
+            for i in range(options['categories'])))
+        self.insert(Location, (
+            Location(name=f'Место {i}',
+                     is_published=self.rng.random() >= unpublished)
+            for i in range(options['locations'])))
+
+        user_ids = self.new_pks(User, first_user)
+        category_ids = list(Category.objects.filter(
+            slug__startswith=f'{prefix}-category-').order_by(
+                'pk').values_list('pk', flat=True))
+        location_ids = self.new_pks(Location, first_location) + [None]
+        first_post = last_pk(Post)
+        if user_ids and category_ids:
+            self.insert(Post, (
+                self.post(user_ids, category_ids, location_ids,
+                          unpublished, options['scheduled'],
+                          options['days'])
+                for _ in range(options['posts'])))
+        post_ids = self.new_pks(Post, first_post)
+        if user_ids and post_ids:
+            self.insert(Comment, (
+                Comment(post_id=self.rng.choice(post_ids),
+                        author_id=self.rng.choice(user_ids),
+                        text=self.text(self.rng.randint(3, 30)))
+                for _ in range(options['comments'])))
+            with transaction.atomic():
+                Post.objects.filter(pk__gt=first_post).update(
+                    comment_count=comment_count_subquery(Comment))
+
+        invalidate_after_bulk_change(*POST_CARD_GENERATION_KEYS)
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded in {time.perf_counter() - started:.1f} s.'))
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def post(self, user_ids, category_ids, location_ids, unpublished,
+             scheduled, days):
+        if self.rng.random() < scheduled:
+            pub_date = self.now + timedelta(
+                minutes=self.rng.randint(1, 60 * 24 * 30))
+        else:
+            pub_date = self.now - timedelta(
+                minutes=self.rng.randint(1, 60 * 24 * days))
+        return Post(
+            title=self.text(self.rng.randint(2, 6)).capitalize(),
+            text=self.text(self.rng.randint(20, 200)),
+            pub_date=pub_date,
+            author_id=self.rng.choice(user_ids),
+            category_id=self.rng.choice(category_ids),
+            location_id=self.rng.choice(location_ids),
+            is_published=self.rng.random() >= unpublished)
+
+    def new_pks(self, model, after):
+        return list(model.objects.filter(pk__gt=after).order_by(
+            'pk').values_list('pk', flat=True))
+
+    def insert(self, model, objects):
+        """Saves `objects` with bulk_create, batch by batch."""
+        started = time.perf_counter()
+        total = 0
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            total += len(batch)
+            if self.verbosity > 1:
+                self.stdout.write(f'  {model.__name__}: {total}')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {total} rows in '
+            f'{elapsed:.1f} s, {total / max(elapsed, 1e-6):.0f} rows/s.')
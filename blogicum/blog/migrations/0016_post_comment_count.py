@@ -0,0 +1,26 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:09
+
+from django.db import migrations, models
+
+from blog.comment_counts import comment_count_subquery
+
+
+def fill_comment_count(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    Post.objects.update(comment_count=comment_count_subquery(Comment))
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_auto_20240228_0034'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_comment_count, migrations.RunPython.noop),
+    ]
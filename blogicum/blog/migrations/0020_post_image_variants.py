@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0019_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Ширины уменьшенных копий фото'),
+        ),
+    ]
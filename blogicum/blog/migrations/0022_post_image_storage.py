@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:31
+
+import blog.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0021_imagejob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=blog.storage.ContentAddressedStorage(), upload_to='images', verbose_name='Фото'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('image', ''), _negated=True), fields=['image'], name='post_image_idx'),
+        ),
+    ]
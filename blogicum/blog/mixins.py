@@ -4,6 +4,8 @@ from django.urls import reverse
 
 from blog.models import Comment, Post
 from .forms import CommentForm, PostForm
+from .jobs import enqueue_image_job
+from .lookups import attach_relations
 
 
 class SuccessUrlToProfileMixin:
@@ -36,6 +38,16 @@ class PostFormMixin:
     form_class = PostForm
 
 
+class PostImageVariantsMixin:
+    """Queues resized copies of a newly uploaded post image."""
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if 'image' in form.changed_data:
+            enqueue_image_job(self.object)
+        return response
+
+
 class CommentFormMixin:
     form_class = CommentForm
 
@@ -46,11 +58,24 @@ class CommentRequiredAttrsMixin:
     pk_url_kwarg = 'post_id'
 
 
-class PostUpdateDeleteMixin(LoginRequiredMixin, PostRequiredAttrsMixin):
+class SinglePostFetchMixin:
+    """Loads the post with its relations once per request."""
+
+    def get_queryset(self):
+        return Post.objects.select_related('author')
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_post'):
+            self._post = attach_relations(super().get_object(queryset))
+        return self._post
+
+
+class PostUpdateDeleteMixin(LoginRequiredMixin,
+                            SinglePostFetchMixin,
+                            PostRequiredAttrsMixin):
 
     def dispatch(self, request, *args, **kwargs):
-        instance = get_object_or_404(Post, pk=kwargs['post_id'])
-        if instance.author != request.user:
+        if self.get_object().author_id != request.user.pk:
             return redirect('blog:post_detail', kwargs['post_id'])
         return super().dispatch(request, *args, **kwargs)
 
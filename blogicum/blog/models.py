@@ -1,8 +1,11 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 
 from core.models import PublishedCreatedModel
+from .search import SearchField
+from .storage import ContentAddressedStorage
 
 
 User = get_user_model()
@@ -44,11 +47,47 @@ class Post(PublishedCreatedModel):
         'Фото',
         blank=True,
         upload_to='images',
+        storage=ContentAddressedStorage(),
+    )
+    image_variants = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        verbose_name='Ширины уменьшенных копий фото'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено'
     )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_published_feed_idx'),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_category_feed_idx'),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'),
+            models.Index(
+                fields=('-updated_at',),
+                name='post_updated_idx'),
+            models.Index(
+                fields=('image',),
+                condition=~models.Q(image=''),
+                name='post_image_idx'),
+        )
 
     def __str__(self):
         return self.title
@@ -118,6 +157,96 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_thread_idx'),
+        )
 
     def __str__(self):
         return str(self.post)
+
+
+class ImageJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Пост'
+    )
+    image_name = models.CharField(
+        max_length=100,
+        verbose_name='Файл фото'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки'
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Запустить после'
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взято в работу'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
+
+    class Meta:
+        verbose_name = 'обработка фото'
+        verbose_name_plural = 'Обработка фото'
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='image_job_queue_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.image_name} ({self.get_status_display()})'
+
+
+class PostSearchIndex(models.Model):
+    """SQLite FTS5 index over post titles and texts.
+
+    The table and the triggers that keep it in sync with `blog_post` are
+    created by a migration; `rank` is bm25 with the title weighted higher.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='search_index'
+    )
+    document = SearchField(db_column='blog_post_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'blog_post_fts'
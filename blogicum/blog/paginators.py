@@ -0,0 +1,142 @@
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from core.metrics import metrics
+from .caching import FEED_COUNT_TIMEOUT, seconds_until_next_publication
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that keeps the feed total in the Django cache."""
+
+    def __init__(self, object_list, per_page, cache_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return super().count
+        count = cache.get(self.cache_key)
+        metrics.inc('blogicum_cache_requests_total', cache='feed_count',
+                    result='miss' if count is None else 'hit')
+        if count is None:
+            count = super().count
+            cache.set(self.cache_key, count,
+                      seconds_until_next_publication(FEED_COUNT_TIMEOUT))
+        return count
+
+
+class KeysetPage(Sequence):
+    """A page of a keyset paginated feed."""
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Keyset page>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+
+class KeysetPaginator:
+    """Paginates a queryset by (key_field, id) instead of OFFSET and COUNT.
+
+    Pages are addressed by an opaque cursor pointing at the first or the
+    last item of the neighbouring page, so fetching a deep page costs the
+    same index range scan as fetching the first one.
+    """
+
+    def __init__(self, queryset, per_page,
+                 key_field='pub_date', descending=True):
+        self.key_field = key_field
+        self.descending = descending
+        sign = '-' if descending else ''
+        self.queryset = queryset.order_by(f'{sign}{key_field}', f'{sign}id')
+        self.per_page = per_page
+
+    def encode_cursor(self, item):
+        value = f'{getattr(item, self.key_field).isoformat()}|{item.pk}'
+        return urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Returns (key, id) or None for a malformed cursor."""
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            key, pk = urlsafe_b64decode(
+                (cursor + padding).encode()).decode().split('|')
+            return datetime.fromisoformat(key), int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            return None
+
+    def get_page(self, after=None, before=None):
+        """Returns the page following `after` or preceding `before`."""
+        before_key = self.decode_cursor(before) if before else None
+        if before_key:
+            return self._page_before(*before_key)
+        after_key = self.decode_cursor(after) if after else None
+        if after_key:
+            return self._page_after(*after_key)
+        return self._page_after()
+
+    def _seek(self, queryset, key, pk, forward):
+        """Keeps the items that follow (key, pk) in the given direction."""
+        lookup, id_lookup = (
+            ('lte', 'gte') if forward == self.descending else ('gte', 'lte'))
+        return queryset.filter(
+            **{f'{self.key_field}__{lookup}': key}).exclude(
+                **{self.key_field: key, f'id__{id_lookup}': pk})
+
+    def _page_after(self, key=None, pk=None):
+        queryset = self.queryset
+        if key is not None:
+            queryset = self._seek(queryset, key, pk, forward=True)
+        items = list(queryset[:self.per_page + 1])
+        has_next = len(items) > self.per_page
+        items = items[:self.per_page]
+        if not items and key is not None:
+            return self._page_after()
+        return KeysetPage(
+            items,
+            self,
+            next_cursor=self.encode_cursor(items[-1]) if has_next else None,
+            previous_cursor=(self.encode_cursor(items[0])
+                             if key is not None else None))
+
+    def _page_before(self, key, pk):
+        queryset = self._seek(
+            self.queryset, key, pk, forward=False).reverse()
+        items = list(queryset[:self.per_page + 1])
+        has_previous = len(items) > self.per_page
+        items = items[:self.per_page][::-1]
+        if not items:
+            return self._page_after()
+        return KeysetPage(
+            items,
+            self,
+            next_cursor=self.encode_cursor(items[-1]),
+            previous_cursor=(self.encode_cursor(items[0])
+                             if has_previous else None))
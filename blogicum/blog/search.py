@@ -0,0 +1,40 @@
+import re
+
+from django.db import models
+
+MAX_QUERY_TERMS = 10
+
+
+class SearchField(models.TextField):
+    """The hidden FTS5 column named after its table, used for MATCH."""
+
+
+@SearchField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class Unindexed(models.Func):
+    """The value of a column, hidden from the indexes by a unary plus.
+
+    SQLite does not use an index for `+column`, which keeps it from
+    driving a query from that index when another index or table should
+    lead.
+    """
+
+    template = '+%(expressions)s'
+
+
+def to_match_query(text):
+    """Turns user input into an FTS5 query of quoted prefix terms.
+
+    Quoting keeps FTS5 operators typed by users from being interpreted,
+    and every term has to match, as in most site searches.
+    """
+    terms = re.findall(r'\w+', text)[:MAX_QUERY_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
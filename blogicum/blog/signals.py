@@ -0,0 +1,194 @@
+import threading
+from collections import Counter
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.metrics import metrics
+from .caching import (PAGE_GLOBAL_TAG, invalidate_all_feed_counts,
+                      invalidate_page_tags, invalidate_post_card,
+                      invalidate_post_cards, invalidate_post_feed_counts,
+                      post_page_tags)
+from .images import release_image
+from .lookups import clear_table_cache
+from .models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+# posts, pending and done comment deletes of the cascades in this thread
+_deleting = threading.local()
+
+
+def get_delete_state():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+        _deleting.comments = Counter()
+        _deleting.deleted_comments = Counter()
+    return _deleting
+
+
+@receiver(post_init, sender=Post)
+def remember_post_category(sender, instance, **kwargs):
+    instance._loaded_category_id = instance.category_id
+    # read the raw value so that a deferred image is not fetched
+    instance._loaded_image = str(instance.__dict__.get('image') or '')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    category_ids = {instance.category_id, instance._loaded_category_id}
+    category_slugs = Category.objects.filter(
+        pk__in=category_ids).values_list('slug', flat=True)
+    invalidate_post_feed_counts(category_slugs, instance.author_id)
+    invalidate_post_card(instance.pk)
+    invalidate_page_tags(*post_page_tags(
+        instance.pk, category_slugs, instance.author.username))
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_post_image(sender, instance, update_fields=None,
+                                **kwargs):
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    loaded_image = instance._loaded_image
+    if loaded_image != instance.image.name:
+        if loaded_image:
+            transaction.on_commit(partial(release_image, loaded_image))
+        storage = instance.image.storage
+        content = storage.reused_uploads().pop(instance.image.name, None)
+        if content is not None:
+            # a concurrent release may delete the reused file before this
+            # post is committed
+            transaction.on_commit(
+                partial(storage.restore, instance.image.name, content))
+    instance._loaded_image = instance.image.name
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_post_image(sender, instance, **kwargs):
+    transaction.on_commit(partial(release_image, instance._loaded_image))
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post(sender, instance, **kwargs):
+    get_delete_state().posts.add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_post(sender, instance, **kwargs):
+    get_delete_state().posts.discard(instance.pk)
+
+
+@receiver(pre_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    get_delete_state().comments[instance.post_id] += 1
+
+
+@receiver(post_delete, sender=Comment)
+def update_deleted_comment_post(sender, instance, **kwargs):
+    """Updates the post once, after the last of its comments is deleted.
+
+    The collector sends pre_delete for a whole cascade before deleting
+    anything, so a user deletion costs one update per commented post and
+    comments of a deleted post cost none; posts deleted in the same
+    cascade are invalidated by their own signals.
+    """
+    state = get_delete_state()
+    post_id = instance.post_id
+    state.comments[post_id] -= 1
+    state.deleted_comments[post_id] += 1
+    if state.comments[post_id] > 0:
+        return
+    del state.comments[post_id]
+    deleted = state.deleted_comments.pop(post_id)
+    if post_id not in state.posts:
+        update_comment_post(post_id, -deleted)
+
+
+@receiver(post_save, sender=Comment)
+def update_saved_comment_post(sender, instance, created=False, raw=False,
+                              **kwargs):
+    # fixtures loaded with loaddata bring their own counters
+    update_comment_post(instance.post_id, int(created and not raw))
+
+
+def update_comment_post(post_id, added):
+    """Moves the comment counter of a post by `added` and expires the
+    cached card and pages showing it.
+    """
+    changes = {'updated_at': timezone.now()}
+    if added:
+        changes['comment_count'] = Greatest(F('comment_count') + added, 0)
+    Post.objects.filter(pk=post_id).update(**changes)
+    invalidate_post_card(post_id)
+    post = Post.objects.select_related(
+        'author', 'category').filter(pk=post_id).first()
+    if post is not None:
+        invalidate_page_tags(*post_page_tags(
+            post.pk,
+            [post.category.slug] if post.category else [],
+            post.author.username))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_feeds(sender, instance, **kwargs):
+    invalidate_all_feed_counts()
+    invalidate_post_cards('category')
+    clear_table_cache('category')
+    invalidate_page_tags(PAGE_GLOBAL_TAG)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_cards(sender, instance, **kwargs):
+    invalidate_post_cards('location')
+    clear_table_cache('location')
+    invalidate_page_tags(PAGE_GLOBAL_TAG)
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    # read the raw value so that a deferred username is not fetched
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_pages(sender, instance, update_fields=None,
+                          created=False, **kwargs):
+    """Expires the profile page, or every page after a rename.
+
+    Other pages show only the username; posts and comments deleted with a
+    user expire their pages through their own signals.
+    """
+    renamed = instance._loaded_username != instance.username
+    instance._loaded_username = instance.username
+    if created or (update_fields is not None
+                   and set(update_fields) == {'last_login'}):
+        return
+    if renamed:
+        invalidate_page_tags(PAGE_GLOBAL_TAG)
+    else:
+        invalidate_page_tags(f'feed:author:{instance.username}')
+
+
+@receiver(post_save, sender=Post)
+def count_created_post(sender, instance, created=False, **kwargs):
+    if created:
+        metrics.inc('blogicum_posts_created_total')
+
+
+@receiver(post_save, sender=Comment)
+def count_created_comment(sender, instance, created=False, **kwargs):
+    if created:
+        metrics.inc('blogicum_comments_created_total')
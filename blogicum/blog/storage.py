@@ -0,0 +1,80 @@
+import hashlib
+import os
+import re
+import threading
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_CHUNK_SIZE = 64 * 1024
+HASHED_NAME_RE = re.compile(r'[0-9a-f]{64}(_\d+w)?')
+
+
+def content_hash(content):
+    """Returns the sha256 hex digest of a file, leaving it rewound."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def is_content_addressed(name):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return HASHED_NAME_RE.fullmatch(stem) is not None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores each distinct upload once under the hash of its content.
+
+    `images/photo.JPG` is saved as `images/ab/abcd…ef.jpg`; saving the same
+    bytes again returns the existing name without writing. Names that are
+    already derived from a hash, such as resized copies, are kept as is.
+    Files are shared between posts, so they are removed with
+    `blog.images.release_image` once no post refers to them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._reused = threading.local()
+
+    def hashed_name(self, name, content):
+        """Returns the name under which `content` is stored."""
+        digest = content_hash(content)
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            directory, digest[:2], f'{digest}{extension}').replace('\\', '/')
+
+    def save(self, name, content, max_length=None):
+        if is_content_addressed(name):
+            return super().save(name, content, max_length)
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        hashed = self.hashed_name(name, content)
+        if self.exists(hashed):
+            self.reused_uploads()[hashed] = content
+            return hashed
+        return super().save(hashed, content, max_length)
+
+    def reused_uploads(self):
+        """Returns the uploads this thread saved without writing them."""
+        if not hasattr(self._reused, 'uploads'):
+            self._reused.uploads = {}
+        return self._reused.uploads
+
+    def restore(self, name, content):
+        """Writes `content` under `name` again if the file is gone.
+
+        A release that ran while the referencing post was uncommitted may
+        have deleted a file that save() reused.
+        """
+        if self.exists(name):
+            return False
+        content.seek(0)
+        stored = self._save(name, content)
+        if stored != name:
+            # another restore won the race
+            self.delete(stored)
+        return True
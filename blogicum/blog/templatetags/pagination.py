@@ -0,0 +1,21 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def elided_page_range(page_obj, on_each_side=2, on_ends=1):
+    """Returns page numbers around the current page plus the first/last."""
+    return page_obj.paginator.get_elided_page_range(
+        page_obj.number,
+        on_each_side=on_each_side,
+        on_ends=on_ends)
+
+
+@register.simple_tag(takes_context=True)
+def query_with(context, **kwargs):
+    """Returns the current query string with `kwargs` replaced."""
+    query = context['request'].GET.copy()
+    for key, value in kwargs.items():
+        query[key] = value
+    return query.urlencode()
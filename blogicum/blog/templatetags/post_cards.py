@@ -0,0 +1,40 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from blog.caching import (POST_CARD_TIMEOUT, get_post_card_generations,
+                          post_card_key, post_card_stats)
+from blog.lookups import attach_relations
+from core.metrics import metrics
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """Renders includes/post_card.html through the fragment cache."""
+    if 'post_card_generations' not in context.render_context:
+        context.render_context[
+            'post_card_generations'] = get_post_card_generations()
+    # the author comes with the post, so a rename only drops its own cards
+    version = (
+        context.render_context['post_card_generations'],
+        post.comment_count,
+        post.updated_at,
+        post.author.username,
+    )
+    key = post_card_key(post.pk)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == version:
+        post_card_stats['hits'] += 1
+        metrics.inc('blogicum_cache_requests_total', cache='post_card',
+                    result='hit')
+        return mark_safe(cached[1])
+    post_card_stats['misses'] += 1
+    metrics.inc('blogicum_cache_requests_total', cache='post_card',
+                result='miss')
+    attach_relations(post)
+    html = get_template('includes/post_card.html').render({'post': post})
+    cache.set(key, (version, str(html)), POST_CARD_TIMEOUT)
+    return html
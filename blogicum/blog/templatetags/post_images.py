@@ -0,0 +1,22 @@
+from django import template
+
+from blog.images import CARD_IMAGE_WIDTH, variant_url
+
+register = template.Library()
+
+
+@register.filter
+def image_src(post):
+    """Returns the variant closest to the card width or the original."""
+    fitting = [width for width in post.image_variants
+               if width <= CARD_IMAGE_WIDTH]
+    if not fitting:
+        return post.image.url
+    return variant_url(post.image, max(fitting))
+
+
+@register.filter
+def image_srcset(post):
+    return ', '.join(
+        f'{variant_url(post.image, width)} {width}w'
+        for width in post.image_variants)
@@ -0,0 +1,97 @@
+import warnings
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+from core.metrics import metrics
+
+
+class OversizedUpload(UploadedFile):
+    """Stands in for an upload whose content was dropped mid-stream."""
+
+    def __init__(self, name, content_type, size):
+        super().__init__(BytesIO(), name, content_type, size)
+
+
+class UploadSizeLimitHandler(FileUploadHandler):
+    """Stops buffering an upload once it exceeds BLOG_IMAGE_MAX_BYTES.
+
+    Later handlers only receive chunks up to the limit, so an oversized
+    upload never fills the disk; the form sees an empty OversizedUpload
+    carrying the real size and rejects it.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.BLOG_IMAGE_MAX_BYTES:
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.received > settings.BLOG_IMAGE_MAX_BYTES:
+            return OversizedUpload(
+                self.file_name, self.content_type, self.received)
+        return None
+
+
+class LimitedImageField(forms.ImageField):
+    """Checks byte and pixel limits before Pillow verifies the image."""
+
+    default_error_messages = {
+        'file_too_large': (
+            'Размер файла %(size)s превышает допустимые %(limit)s.'),
+        'too_many_pixels': (
+            'Слишком большое изображение %(width)s×%(height)s: допускается '
+            'не более %(limit)s мегапикселей.'),
+    }
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return None
+        size = getattr(data, 'size', 0)
+        metrics.observe('blogicum_image_upload_bytes', size)
+        if size > settings.BLOG_IMAGE_MAX_BYTES:
+            raise ValidationError(
+                self.error_messages['file_too_large'],
+                code='file_too_large',
+                params={
+                    'size': filesizeformat(data.size),
+                    'limit': filesizeformat(settings.BLOG_IMAGE_MAX_BYTES),
+                })
+        self.check_pixels(data)
+        return super().to_python(data)
+
+    def check_pixels(self, data):
+        """Reads only the image header, leaving bad files to super()."""
+        limit = settings.BLOG_IMAGE_MAX_PIXELS
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', Image.DecompressionBombWarning)
+                with Image.open(data) as image:
+                    width, height = image.size
+        except (Image.DecompressionBombWarning,
+                Image.DecompressionBombError):
+            width = height = None
+        except Exception:
+            return
+        finally:
+            data.seek(0)
+        if width is None or width * height > limit:
+            raise ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+                params={
+                    'width': width or '?',
+                    'height': height or '?',
+                    'limit': limit // 1_000_000,
+                })
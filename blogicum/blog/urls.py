@@ -5,10 +5,13 @@ from . import views
 app_name = 'blog'
 
 urlpatterns = [
-    path('', views.PostListView.as_view(), name='index'),
+    path('', views.PostListView.as_view(keyset=True), name='index'),
     path('category/<slug:category_slug>/',
          views.category_posts,
          name='category_posts'),
+    path('search/',
+         views.search,
+         name='search'),
     path('profile_edit/',
          views.ProfileUpdateView.as_view(),
          name='edit_profile',),
@@ -18,6 +21,9 @@ urlpatterns = [
     path('posts/<int:post_id>/',
          views.PostDetailView.as_view(),
          name='post_detail'),
+    path('posts/<int:post_id>/comments/',
+         views.PostCommentsView.as_view(),
+         name='post_comments'),
     path('posts/<int:post_id>/edit/',
          views.PostUpdateView.as_view(),
          name='edit_post'),
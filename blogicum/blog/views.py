@@ -1,82 +1,162 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.paginator import Paginator
-from django.db.models import Count
 from django.http import Http404
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
                                   UpdateView)
 
-from blog.models import Category, Post
+from blog.models import Post
+from .caching import cache_anonymous_page, feed_count_key
+from .conditional import conditional_page, feed_timestamps, post_timestamps
+from .paginators import CachedCountPaginator, KeysetPaginator
+from .search import Unindexed, to_match_query
 from .mixins import (SuccessUrlToPostMixin,
                      SuccessUrlToProfileMixin,
                      PostFormMixin,
                      PostFormValidMixin,
+                     PostImageVariantsMixin,
                      PostRequiredAttrsMixin,
                      PostUpdateDeleteMixin,
+                     SinglePostFetchMixin,
                      CommentFormMixin,
                      CommentRequiredAttrsMixin,
                      CommentUpdateDeleteMixin)
 from .forms import CommentForm, ProfileForm
+from .lookups import categories
 
 POSTS_PER_PAGE = 10
 User = get_user_model()
 
 
-def paginate(queryset, request):
+def index_page_tags(**kwargs):
+    return ('feed:index',)
+
+
+def category_page_tags(category_slug, **kwargs):
+    return (f'feed:category:{category_slug}',)
+
+
+def profile_page_tags(username, **kwargs):
+    return (f'feed:author:{username}',)
+
+
+def post_page_tags(post_id, **kwargs):
+    return (f'post:{post_id}',)
+
+
+def paginate(queryset, request, keyset=False, count_key=None):
     """Returns a page object."""
-    paginator = Paginator(queryset, POSTS_PER_PAGE)
+    if keyset:
+        return KeysetPaginator(queryset, POSTS_PER_PAGE).get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'))
+    paginator = CachedCountPaginator(
+        queryset, POSTS_PER_PAGE, cache_key=count_key)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
-def annotate_comment_count(queryset):
-    """Adds annotations about the number of comments to the post."""
-    return queryset.annotate(
-        comment_count=Count(
-            'comments')).order_by(
-                '-pub_date')
+def get_feed_qs():
+    """Returns posts for post cards, which take categories and locations
+    from the table caches.
+    """
+    return Post.objects.select_related('author').order_by('-pub_date')
 
 
 def get_posts_qs_by_category():
-    return annotate_comment_count(Post.objects.select_related(
-        'category').filter(
-            is_published=True,
-            pub_date__lte=timezone.now(),
-            category__is_published=True))
-
+    """Returns the visible posts, newest first.
 
-def get_posts_gs_by_author(username):
-    return annotate_comment_count(Post.objects.select_related(
-        'author').filter(
-            author__username=username))
+    The list of published categories is kept off the category index:
+    SQLite would read every visible post through it and sort them all,
+    where post_published_feed_idx already has the feed order.
+    """
+    return get_feed_qs().alias(
+        feed_category_id=Unindexed('category_id'),
+    ).filter(
+        is_published=True,
+        pub_date__lte=timezone.now(),
+        feed_category_id__in=categories.published_ids())
 
 
-def category_posts(request, category_slug):
+def get_posts_gs_by_author(username):
+    return get_feed_qs().filter(author__username=username)
+
+
+def get_posts_qs_by_search(query):
+    """Returns visible posts matching `query`, best matches first.
+
+    The feed filters are kept off the blog_post indexes: given those,
+    SQLite walks every visible post and runs the full MATCH for each one
+    instead of starting from the matches.
+    """
+    return get_feed_qs().alias(
+        search_published=Unindexed('is_published'),
+        search_pub_date=Unindexed('pub_date'),
+        search_category_id=Unindexed('category_id'),
+    ).filter(
+        search_published=True,
+        search_pub_date__lte=timezone.now(),
+        search_category_id__in=categories.published_ids(),
+        search_index__document__match=to_match_query(query),
+    ).order_by('search_index__rank', '-pub_date')
+
+
+@conditional_page(feed_timestamps, category_page_tags)
+@cache_anonymous_page(category_page_tags)
+def category_posts(request, category_slug, keyset=False):
     template = 'blog/category.html'
-    category = get_object_or_404(
-        Category,
-        slug=category_slug,
-        is_published=True
-    )
-    posts = get_posts_qs_by_category().filter(category__slug=category_slug)
-    context = {'category': category, 'page_obj': paginate(posts, request)}
+    category = categories.get_published_by_slug(category_slug)
+    if category is None:
+        raise Http404
+    posts = get_posts_qs_by_category().filter(category=category)
+    context = {
+        'category': category,
+        'page_obj': paginate(
+            posts, request, keyset,
+            count_key=feed_count_key('category', category_slug))
+    }
     return render(request, template, context)
 
 
-def profile(request, username):
+@conditional_page(feed_timestamps, profile_page_tags)
+@cache_anonymous_page(profile_page_tags)
+def profile(request, username, keyset=False):
     template = 'blog/profile.html'
     profile = get_object_or_404(User, username=username)
     if request.user.is_authenticated and request.user.username == username:
         posts = get_posts_gs_by_author(username)
+        visibility = 'all'
     else:
         posts = get_posts_gs_by_author(username).filter(
             is_published=True,
-            category__is_published=True
+            category_id__in=categories.published_ids()
         )
-    context = {'profile': profile, 'page_obj': paginate(posts, request)}
+        visibility = 'public'
+    context = {
+        'profile': profile,
+        'page_obj': paginate(
+            posts, request, keyset,
+            count_key=feed_count_key('author', profile.pk, visibility))
+    }
+    return render(request, template, context)
+
+
+@conditional_page(feed_timestamps, index_page_tags)
+@cache_anonymous_page(index_page_tags)
+def search(request):
+    template = 'blog/search.html'
+    query = request.GET.get('q', '').strip()
+    if to_match_query(query):
+        posts = get_posts_qs_by_search(query)
+    else:
+        posts = Post.objects.none()
+    context = {
+        'query': query,
+        'page_obj': paginate(posts, request)
+    }
     return render(request, template, context)
 
 
@@ -90,45 +170,78 @@ class ProfileUpdateView(LoginRequiredMixin,
         return self.request.user
 
 
-class PostDetailView(DetailView):
+@method_decorator(
+    (conditional_page(post_timestamps, post_page_tags),
+     cache_anonymous_page(post_page_tags)),
+    name='get')
+class PostDetailView(SinglePostFetchMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
     paginate_by = POSTS_PER_PAGE
     pk_url_kwarg = 'post_id'
 
-    def dispatch(self, request, *args, **kwargs):
-        instance = get_object_or_404(Post, pk=kwargs['post_id'])
-        if instance.author != request.user and instance.is_published is False:
+    def get_object(self, queryset=None):
+        instance = super().get_object(queryset)
+        if (instance.author_id != self.request.user.pk
+                and instance.is_published is False):
             raise Http404
-        return super().dispatch(request, *args, **kwargs)
+        return instance
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = (
-            self.object.comments.select_related(
-                'author').order_by(
-                    'created_at')
-        )
+        context['comments'] = KeysetPaginator(
+            self.object.comments.select_related('author'),
+            self.paginate_by,
+            key_field='created_at',
+            descending=False).get_page(
+                after=self.request.GET.get('comments_after'))
         return context
 
 
+class PostCommentsView(PostDetailView):
+    """Renders one more page of the comment thread as an HTML fragment."""
+
+    template_name = 'includes/comments_page.html'
+
+
+@method_decorator(
+    (conditional_page(feed_timestamps, index_page_tags),
+     cache_anonymous_page(index_page_tags)),
+    name='get')
 class PostListView(ListView):
     template_name = 'blog/index.html'
     paginate_by = POSTS_PER_PAGE
-    queryset = get_posts_qs_by_category()
+    paginator_class = CachedCountPaginator
+    keyset = False
+
+    def get_queryset(self):
+        return get_posts_qs_by_category()
+
+    def get_paginator(self, *args, **kwargs):
+        return super().get_paginator(
+            *args, cache_key=feed_count_key('index'), **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.keyset:
+            return super().paginate_queryset(queryset, page_size)
+        page = paginate(queryset, self.request, keyset=True)
+        return (page.paginator, page, page.object_list,
+                page.has_other_pages())
 
 
 class PostCreateView(LoginRequiredMixin,
                      SuccessUrlToProfileMixin,
                      PostRequiredAttrsMixin,
                      PostFormValidMixin,
+                     PostImageVariantsMixin,
                      PostFormMixin,
                      CreateView):
     pass
 
 
 class PostUpdateView(PostUpdateDeleteMixin,
+                     PostImageVariantsMixin,
                      PostFormMixin,
                      UpdateView):
     pass
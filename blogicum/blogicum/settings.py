@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -54,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,9 +76,35 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+BLOG_IMAGE_MAX_BYTES = 5 * 1024 * 1024
+
+BLOG_IMAGE_MAX_PIXELS = 25_000_000
+
+REQUEST_METRICS_SLOW_MS = 500
+
+REQUEST_METRICS_SLOW_SAMPLES = 50
+
+# Shared by all workers of one server for /metrics and the staff request
+# metrics; empty it on restart.
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+
+METRICS_FLUSH_INTERVAL = 1
+
+# Only trusted without a reverse proxy: behind one, every client has the
+# proxy's address, so set METRICS_TOKEN and scrape with a bearer token.
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+FILE_UPLOAD_HANDLERS = [
+    'blog.uploads.UploadSizeLimitHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.instrumentation.InstrumentedTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -104,6 +132,23 @@ DATABASES = {
 }
 
 
+# Generation and tag versions in this cache invalidate pages, post cards,
+# feed totals and the category and location tables in every worker, so
+# all processes must share it. Files work for one host; several hosts
+# need a networked backend such as memcached. Versions are timestamps
+# written with a plain set(), so the backend needs no atomic incr, and a
+# version key lost to culling restarts at a new value.
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.SweepingFileBasedCache',
+        'LOCATION': os.environ.get('BLOGICUM_CACHE_DIR', BASE_DIR / 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -5,6 +5,8 @@ from django.conf.urls.static import static
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
 
+from core.views import metrics_view, request_metrics_view
+
 handler403 = 'pages.views.csrf_failure'
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.server_error'
@@ -19,7 +21,10 @@ urlpatterns = [
         ),
         name='registration',
     ),
+    path('admin/request-metrics/', request_metrics_view,
+         name='request_metrics'),
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
     path('', include('blog.urls', namespace='blog')),
     path('pages/', include('pages.urls', namespace='pages')),
     path('auth/', include('django.contrib.auth.urls')),
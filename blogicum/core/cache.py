@@ -0,0 +1,33 @@
+"""The file cache shared by the workers of one host.
+
+Django's FileBasedCache lists its whole directory before every set() to
+decide whether to cull, and leaves expired files on disk until someone
+reads them again. This backend looks at the directory at most once per
+CULL_INTERVAL seconds in each process, removes the expired files first
+and only culls at random when the cache is still over MAX_ENTRIES.
+"""
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+CULL_INTERVAL = 60
+
+# keyed by directory, as Django creates a backend per thread
+_culled_at = {}
+
+
+class SweepingFileBasedCache(FileBasedCache):
+    def _cull(self):
+        now = time.monotonic()
+        culled_at = _culled_at.get(self._dir)
+        if culled_at is not None and now - culled_at < CULL_INTERVAL:
+            return
+        _culled_at[self._dir] = now
+        for path in self._list_cache_files():
+            try:
+                with open(path, 'rb') as file:
+                    self._is_expired(file)
+            except FileNotFoundError:
+                # removed by another worker meanwhile
+                continue
+        super()._cull()
@@ -0,0 +1,311 @@
+"""Per-view request instrumentation that is cheap enough for production.
+
+RequestMetricsMiddleware times every request and counts its queries
+through connection.execute_wrapper(), so DEBUG and connection.queries are
+not needed. Template render time comes from the InstrumentedTemplates
+backend. Figures are aggregated per `resolver_match.view_name` in the
+memory of each worker process; requests slower than
+REQUEST_METRICS_SLOW_MS are kept with their SQL in a short ring buffer.
+
+When METRICS_MULTIPROC_DIR is set, workers also write their figures there
+like core.metrics does, and collect() adds up those of all workers. A
+clear is stamped in the directory and every worker drops its figures at
+its next flush, while files from before the stamp are left out.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+from .metrics import metrics
+
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+UNRESOLVED_VIEW = '<unresolved>'
+MAX_SAMPLED_QUERIES = 100
+CLEARED_FILE = 'requests.cleared'
+
+_current = ContextVar('request_metrics_current', default=None)
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def add_up(total, part):
+    """Adds the numbers of the nested dict `part` into `total`."""
+    for key, value in part.items():
+        if isinstance(value, dict):
+            add_up(total.setdefault(key, {}), value)
+        else:
+            total[key] = round(total.get(key, 0) + value, 3)
+    return total
+
+
+def read_cleared_at(directory):
+    try:
+        return float((Path(directory) / CLEARED_FILE).read_text())
+    except (OSError, ValueError):
+        return 0
+
+
+class Histogram:
+    """Counts of observed values per bucket, plus their sum."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value):
+        index = 0
+        for bound in self.bounds:
+            if value <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+    def as_dict(self):
+        labels = [str(bound) for bound in self.bounds] + ['+Inf']
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'count': self.total,
+            'sum': round(self.sum, 3),
+        }
+
+
+class RequestRecord:
+    """What one request did, filled in while it runs."""
+
+    __slots__ = ('queries', 'sql_ms', 'render_ms', 'render_depth', 'sql')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.render_ms = 0.0
+        self.render_depth = 0
+        self.sql = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.queries += 1
+            self.sql_ms += elapsed
+            if len(self.sql) < MAX_SAMPLED_QUERIES:
+                self.sql.append((sql, round(elapsed, 3)))
+
+
+class ViewStats:
+    def __init__(self):
+        self.duration_ms = Histogram(DURATION_BUCKETS_MS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.sql_ms = 0.0
+        self.render_ms = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+    def add(self, record, duration_ms, status, size):
+        self.duration_ms.observe(duration_ms)
+        self.queries.observe(record.queries)
+        self.sql_ms += record.sql_ms
+        self.render_ms += record.render_ms
+        self.response_bytes += size
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def as_dict(self):
+        return {
+            'requests': self.duration_ms.total,
+            'duration_ms': self.duration_ms.as_dict(),
+            'queries': self.queries.as_dict(),
+            'sql_ms': round(self.sql_ms, 3),
+            'render_ms': round(self.render_ms, 3),
+            'response_bytes': self.response_bytes,
+            'statuses': {
+                str(status): count
+                for status, count in sorted(self.statuses.items())},
+        }
+
+
+class RequestMetrics:
+    """Aggregates of this worker process, shared by its threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flushed_at = 0
+        self._cleared_at = 0
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.views = {}
+            self.slow = deque(maxlen=get_setting(
+                'REQUEST_METRICS_SLOW_SAMPLES', 50))
+
+    def clear_all(self):
+        """Clears the figures of this worker and, via the stamp, of all."""
+        cleared_at = time.time()
+        directory = get_setting('METRICS_MULTIPROC_DIR', None)
+        if directory:
+            path = Path(directory) / CLEARED_FILE
+            tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            tmp_path.write_text(repr(cleared_at))
+            os.replace(tmp_path, path)
+        self.clear()
+        self._cleared_at = cleared_at
+
+    def record(self, view_name, path, record, duration_ms, status, size):
+        slow = duration_ms >= get_setting('REQUEST_METRICS_SLOW_MS', 500)
+        with self._lock:
+            stats = self.views.get(view_name)
+            if stats is None:
+                stats = self.views[view_name] = ViewStats()
+            stats.add(record, duration_ms, status, size)
+            if slow:
+                self.slow.append({
+                    'at': datetime.now(timezone.utc).isoformat(),
+                    'view': view_name,
+                    'path': path,
+                    'status': status,
+                    'duration_ms': round(duration_ms, 3),
+                    'queries': record.queries,
+                    'sql_ms': round(record.sql_ms, 3),
+                    'render_ms': round(record.render_ms, 3),
+                    'sql': record.sql,
+                })
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'views': {
+                    name: stats.as_dict()
+                    for name, stats in sorted(self.views.items())},
+                'slow_requests': list(self.slow),
+            }
+
+    def maybe_flush(self):
+        """Writes the figures to the shared directory if they are stale."""
+        directory = get_setting('METRICS_MULTIPROC_DIR', None)
+        if not directory:
+            return
+        now = time.monotonic()
+        if now - self._flushed_at < get_setting('METRICS_FLUSH_INTERVAL', 1):
+            return
+        self._flushed_at = now
+        cleared_at = read_cleared_at(directory)
+        if cleared_at > self._cleared_at:
+            self.clear()
+            self._cleared_at = cleared_at
+        path = Path(directory) / f'requests-{os.getpid()}.json'
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        tmp_path.write_text(json.dumps(
+            {'cleared_at': self._cleared_at, **self.snapshot()}))
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Returns the figures of every worker, added up."""
+        snapshots = [self.snapshot()]
+        directory = get_setting('METRICS_MULTIPROC_DIR', None)
+        if directory:
+            cleared_at = read_cleared_at(directory)
+            own = f'requests-{os.getpid()}.json'
+            for path in Path(directory).glob('requests-*.json'):
+                if path.name == own:
+                    continue
+                try:
+                    snapshot = json.loads(path.read_text())
+                except (OSError, ValueError):
+                    continue
+                if snapshot.pop('cleared_at', 0) >= cleared_at:
+                    snapshots.append(snapshot)
+        views = {}
+        slow = []
+        for snapshot in snapshots:
+            for name, stats in snapshot['views'].items():
+                add_up(views.setdefault(name, {}), stats)
+            slow += snapshot['slow_requests']
+        slow.sort(key=lambda sample: sample['at'])
+        return {
+            'scope': 'all workers' if directory else 'this worker only',
+            'workers': len(snapshots),
+            'views': dict(sorted(views.items())),
+            'slow_requests': slow[-get_setting(
+                'REQUEST_METRICS_SLOW_SAMPLES', 50):],
+        }
+
+
+request_metrics = RequestMetrics()
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        record = RequestRecord()
+        token = _current.set(record)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(record))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration_ms = (time.perf_counter() - start) * 1000
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else UNRESOLVED_VIEW
+        size = 0 if response.streaming else len(response.content)
+        request_metrics.record(view_name, request.path, record, duration_ms,
+                               response.status_code, size)
+        metrics.inc('blogicum_requests_total', view=view_name,
+                    status=response.status_code)
+        metrics.observe('blogicum_request_duration_seconds',
+                        duration_ms / 1000, view=view_name)
+        metrics.observe('blogicum_request_queries', record.queries,
+                        view=view_name)
+        metrics.maybe_flush()
+        request_metrics.maybe_flush()
+        return response
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        record = _current.get()
+        if record is None:
+            return super().render(context, request)
+        # includes rendered through the backend are part of the outer time
+        record.render_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            record.render_depth -= 1
+            if not record.render_depth:
+                record.render_ms += (time.perf_counter() - start) * 1000
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """The Django template backend, timing top-level renders."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(
+            self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
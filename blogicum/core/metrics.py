@@ -0,0 +1,196 @@
+"""In-process metrics published in the Prometheus text format.
+
+Each worker counts in its own memory. When METRICS_MULTIPROC_DIR is set,
+the worker also writes its totals to a file of its own, at most once per
+METRICS_FLUSH_INTERVAL seconds, and the exporter adds up the files of all
+workers. Files of stopped workers are kept, so counters never go down;
+empty the directory when the whole server is restarted.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (
+    64 * 1024, 256 * 1024, 1024 * 1024, 2 * 1024 * 1024, 5 * 1024 * 1024,
+    10 * 1024 * 1024)
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+
+METRICS = {
+    'blogicum_requests_total': (
+        COUNTER, 'Requests answered, by view and status.', None),
+    'blogicum_request_duration_seconds': (
+        HISTOGRAM, 'Request duration, by view.', DURATION_BUCKETS),
+    'blogicum_request_queries': (
+        HISTOGRAM, 'SQL queries per request, by view.', QUERY_BUCKETS),
+    'blogicum_cache_requests_total': (
+        COUNTER, 'Cache lookups, by cache and result.', None),
+    'blogicum_posts_created_total': (
+        COUNTER, 'Posts created.', None),
+    'blogicum_comments_created_total': (
+        COUNTER, 'Comments created.', None),
+    'blogicum_image_upload_bytes': (
+        HISTOGRAM, 'Size of uploaded post images.', BYTES_BUCKETS),
+}
+
+
+def format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\').replace(
+            '"', r'\"').replace('\n', r'\n'))
+        for name, value in labels)
+    return f'{{{pairs}}}'
+
+
+class Registry:
+    """Counters and histograms of one process, keyed by name and labels.
+
+    A sample is stored as [count] for counters and as bucket counts
+    followed by the sum and the count for histograms.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._flushed_at = 0
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                sample = self._samples[key] = [0]
+            sample[0] += value
+
+    def observe(self, name, value, **labels):
+        bounds = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                sample = self._samples[key] = [0] * (len(bounds) + 2)
+            for index, bound in enumerate(bounds):
+                if value <= bound:
+                    sample[index] += 1
+                    break
+            sample[-2] += value
+            sample[-1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._samples = {}
+
+    def snapshot(self):
+        with self._lock:
+            return [[name, labels, list(sample)]
+                    for (name, labels), sample in self._samples.items()]
+
+    def maybe_flush(self):
+        """Writes the totals to the shared directory if they are stale."""
+        directory = getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+        if not directory:
+            return
+        now = time.monotonic()
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1)
+        if now - self._flushed_at < interval:
+            return
+        self._flushed_at = now
+        path = Path(directory) / f'worker-{os.getpid()}.json'
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        tmp_path.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Returns the samples of every worker, added up."""
+        snapshots = [self.snapshot()]
+        directory = getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+        if directory:
+            own = f'worker-{os.getpid()}.json'
+            for path in Path(directory).glob('worker-*.json'):
+                if path.name == own:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue
+        totals = {}
+        for snapshot in snapshots:
+            for name, labels, sample in snapshot:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                total = totals.setdefault(key, [0] * len(sample))
+                for index, value in enumerate(sample):
+                    total[index] += value
+        return totals
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        totals = self.collect()
+        lines = []
+        for name, (kind, help_text, bounds) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for (sample_name, labels), sample in sorted(totals.items()):
+                if sample_name != name:
+                    continue
+                if kind == COUNTER:
+                    lines.append(
+                        f'{name}{format_labels(labels)} '
+                        f'{format_value(sample[0])}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(bounds, sample):
+                    cumulative += count
+                    le = (('le', format_value(bound)),)
+                    lines.append(
+                        f'{name}_bucket{format_labels(labels + le)} '
+                        f'{cumulative}')
+                le = (('le', '+Inf'),)
+                lines.append(
+                    f'{name}_bucket{format_labels(labels + le)} '
+                    f'{sample[-1]}')
+                lines.append(
+                    f'{name}_sum{format_labels(labels)} '
+                    f'{format_value(sample[-2])}')
+                lines.append(
+                    f'{name}_count{format_labels(labels)} {sample[-1]}')
+        lines += self.render_hit_ratios(totals)
+        return '\n'.join(lines) + '\n'
+
+    def render_hit_ratios(self, totals):
+        lookups = {}
+        for (name, labels), sample in totals.items():
+            if name == 'blogicum_cache_requests_total':
+                labels = dict(labels)
+                hits, total = lookups.get(labels['cache'], (0, 0))
+                lookups[labels['cache']] = (
+                    hits + sample[0] * (labels['result'] == 'hit'),
+                    total + sample[0])
+        lines = [
+            '# HELP blogicum_cache_hit_ratio Share of cache lookups that '
+            'hit, by cache.',
+            '# TYPE blogicum_cache_hit_ratio gauge',
+        ]
+        for cache_name, (hits, total) in sorted(lookups.items()):
+            lines.append(
+                f'blogicum_cache_hit_ratio'
+                f'{format_labels((("cache", cache_name),))} '
+                f'{round(hits / total, 4) if total else 0}')
+        return lines
+
+
+metrics = Registry()
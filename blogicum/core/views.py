@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+
+from .instrumentation import request_metrics
+from .metrics import metrics
+
+
+@staff_member_required
+def request_metrics_view(request):
+    """Shows the request aggregates of all workers, or of the worker that
+    answers when METRICS_MULTIPROC_DIR is not set.
+    """
+    if request.method == 'POST':
+        request_metrics.clear_all()
+    return JsonResponse(
+        request_metrics.collect(), json_dumps_params={'indent': 2})
+
+
+def is_metrics_scraper(request):
+    """Checks the bearer token if one is set, else the client address.
+
+    Behind a reverse proxy on the same host every client has the proxy's
+    REMOTE_ADDR, so such deployments have to set METRICS_TOKEN.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        return constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics_view(request):
+    """Publishes the metrics of all workers for a Prometheus scraper."""
+    # handler403 renders the CSRF failure page, so answer directly
+    if not is_metrics_scraper(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4')
@@ -41,6 +41,27 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True, scope="session")
+def isolated_cache(tmp_path_factory):
+    from django.conf import settings
+
+    caches = {"default": {
+        **settings.CACHES["default"],
+        "LOCATION": str(tmp_path_factory.mktemp("cache")),
+    }}
+    with override_settings(CACHES=caches):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
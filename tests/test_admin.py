@@ -0,0 +1,141 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.models import Category, Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def admin_posts(mixer: Mixer, user, published_category):
+    return (
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Осенний парк",
+        ),
+        mixer.blend(
+            "blog.Post", category=published_category, title="Зимний лес",
+        ),
+    )
+
+
+def changelist(admin_client, url, query):
+    response = admin_client.get(url, {"q": query})
+    assert response.status_code == 200
+    return list(response.context["cl"].result_list)
+
+
+def test_post_admin_searches_text_and_author(
+    admin_client, user, admin_posts
+):
+    url = "/admin/blog/post/"
+    assert changelist(admin_client, url, "осен") == [admin_posts[0]], (
+        "Убедитесь, что поиск в админке использует полнотекстовый индекс."
+    )
+    assert changelist(admin_client, url, user.username) == [admin_posts[0]]
+
+
+def test_comment_admin_searches_author(mixer: Mixer, admin_client, user):
+    comment = mixer.blend("blog.Comment", author=user)
+    mixer.blend("blog.Comment")
+    assert changelist(
+        admin_client, "/admin/blog/comment/", user.username
+    ) == [comment]
+
+
+@pytest.mark.parametrize("model", ("post", "comment"))
+def test_admin_changelist_queries_do_not_grow_with_rows(
+    mixer: Mixer, admin_client, django_assert_num_queries, model
+):
+    url = f"/admin/blog/{model}/"
+    mixer.blend(f"blog.{model}")
+    with CaptureQueriesContext(connection) as page_queries:
+        admin_client.get(url)
+    mixer.cycle(14).blend(f"blog.{model}")
+    with django_assert_num_queries(len(page_queries)):
+        admin_client.get(url)
+
+
+def run_action(admin_client, model, action, objects, **params):
+    return admin_client.post(
+        f"/admin/blog/{model}/",
+        {
+            "action": action,
+            "_selected_action": [obj.pk for obj in objects],
+            **params,
+        },
+        follow=True,
+    )
+
+
+def test_unpublish_action_updates_rows_and_pages(
+    mixer: Mixer, admin_client, client, user, published_category
+):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+    assert client.get("/").context is not None
+    assert client.get("/").context is None
+
+    response = run_action(
+        admin_client, "post", "unpublish_selected", posts[:2]
+    )
+    assert "Снято с публикации записей: 2." in response.content.decode(), (
+        "Убедитесь, что действие сообщает, сколько записей изменено."
+    )
+    assert Post.objects.filter(is_published=True).get() == posts[2]
+    assert list(client.get("/").context["page_obj"]) == [posts[2]], (
+        "Убедитесь, что массовые действия сбрасывают кэш страниц."
+    )
+
+
+def test_publish_action_covers_whole_filtered_result(
+    mixer: Mixer, admin_client, published_category
+):
+    posts = mixer.cycle(20).blend(
+        "blog.Post", category=published_category, is_published=False
+    )
+    response = run_action(
+        admin_client, "post", "publish_selected", posts[:1],
+        select_across=1, index=0,
+    )
+    assert "Опубликовано записей: 20." in response.content.decode()
+
+
+def test_bulk_delete_posts_removes_comments(
+    mixer: Mixer, admin_client, published_category
+):
+    post, kept = mixer.cycle(2).blend(
+        "blog.Post", category=published_category
+    )
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    mixer.blend("blog.Comment", post=kept)
+
+    run_action(admin_client, "post", "bulk_delete_selected", [post])
+    assert list(Post.objects.all()) == [kept]
+    assert Comment.objects.get().post == kept
+
+
+def test_bulk_delete_comments_recounts_posts(
+    mixer: Mixer, admin_client, published_category
+):
+    post = mixer.blend("blog.Post", category=published_category)
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    run_action(admin_client, "comment", "bulk_delete_selected", comments[:2])
+    post.refresh_from_db()
+    assert post.comment_count == 1
+
+
+def test_bulk_delete_categories_detaches_posts(
+    mixer: Mixer, admin_client, published_category
+):
+    post = mixer.blend("blog.Post", category=published_category)
+    run_action(
+        admin_client, "category", "bulk_delete_selected", [published_category]
+    )
+    post.refresh_from_db()
+    assert post.category is None
+    assert not Category.objects.exists()
@@ -0,0 +1,348 @@
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.caching import (FEED_COUNT_GENERATION_KEY, PAGE_CACHE_TIMEOUT,
+                          post_card_stats, seconds_until_next_publication)
+from core import cache as file_cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def card_post(mixer: Mixer, user, published_category, published_location):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        location=published_location,
+    )
+
+
+def render_index(client):
+    post_card_stats.clear()
+    content = client.get("/").content.decode()
+    return content, dict(post_card_stats)
+
+
+@pytest.mark.parametrize(
+    "change",
+    (
+        lambda post: setattr(post, "title", "Новый заголовок") or post.save(),
+        lambda post: setattr(
+            post.category, "title", "Новая категория"
+        ) or post.category.save(),
+        lambda post: setattr(
+            post.location, "name", "Новое место"
+        ) or post.location.save(),
+        lambda post: setattr(
+            post.author, "username", "renamed"
+        ) or post.author.save(),
+    ),
+    ids=["post", "category", "location", "author"],
+)
+def test_post_card_cache_is_invalidated_on_change(
+    user_client, card_post, change
+):
+    _, stats = render_index(user_client)
+    assert stats == {"misses": 1}
+    _, stats = render_index(user_client)
+    assert stats == {"hits": 1}, (
+        "Убедитесь, что карточка публикации берётся из кэша при повторном"
+        " отображении ленты."
+    )
+
+    change(card_post)
+    content, stats = render_index(user_client)
+    assert stats == {"misses": 1}, (
+        "Убедитесь, что кэш карточки публикации сбрасывается при изменении"
+        " отображаемых в ней данных."
+    )
+    assert any(
+        text in content
+        for text in ("Новый заголовок", "Новая категория", "Новое место",
+                     "@renamed")
+    )
+
+
+def test_culled_generation_does_not_revive_old_counts(
+    mixer: Mixer, user_client, card_post
+):
+    url = f"/category/{card_post.category.slug}/"
+    other_category = mixer.blend("blog.Category", is_published=True)
+
+    def feed_count():
+        return user_client.get(url).context["page_obj"].paginator.count
+
+    assert feed_count() == 1
+    other_category.save()
+    mixer.blend(
+        "blog.Post", author=card_post.author, category=card_post.category)
+    assert feed_count() == 2
+
+    cache.delete(FEED_COUNT_GENERATION_KEY)
+    for _ in range(5):
+        other_category.save()
+        assert feed_count() == 2, (
+            "Убедитесь, что после вытеснения ключа версии из кэша не"
+            " возвращаются значения, посчитанные до её смены."
+        )
+
+
+def test_file_cache_sweeps_expired_entries_once_per_interval(
+    tmp_path, monkeypatch
+):
+    backend = file_cache.SweepingFileBasedCache(str(tmp_path), {})
+    now = [1000.0]
+    monkeypatch.setattr(file_cache.time, "monotonic", lambda: now[0])
+    listings = []
+    list_files = backend._list_cache_files
+    monkeypatch.setattr(
+        backend, "_list_cache_files",
+        lambda: listings.append(1) or list_files())
+
+    backend.set("expired", 1, 0)
+    backend.set("kept", 2)
+    backend.set("also-kept", 3)
+    assert len(listings) == 2, (
+        "Убедитесь, что файловый кэш не просматривает каталог при каждой"
+        " записи."
+    )
+    assert len(list(tmp_path.iterdir())) == 3
+
+    now[0] += file_cache.CULL_INTERVAL
+    backend.set("new", 4)
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        Path(backend._key_to_file(key)).name
+        for key in ("kept", "also-kept", "new")
+    ), "Убедитесь, что файловый кэш удаляет просроченные записи."
+
+
+def test_author_rename_only_drops_own_cards(
+    mixer: Mixer, user_client, card_post, another_user
+):
+    mixer.blend(
+        "blog.Post", author=another_user, category=card_post.category)
+    render_index(user_client)
+    card_post.author.first_name = "Имя"
+    card_post.author.save()
+    _, stats = render_index(user_client)
+    assert stats == {"hits": 2}, (
+        "Убедитесь, что правка профиля без смены имени пользователя не"
+        " сбрасывает карточки публикаций."
+    )
+
+    another_user.username = "renamed"
+    another_user.save()
+    content, stats = render_index(user_client)
+    assert stats == {"hits": 1, "misses": 1} and "@renamed" in content, (
+        "Убедитесь, что смена имени пользователя сбрасывает только"
+        " карточки его публикаций."
+    )
+
+
+def test_post_card_cache_follows_comment_count(user_client, card_post):
+    render_index(user_client)
+    user_client.post(
+        f"/posts/{card_post.id}/comment/", data={"text": "Комментарий"}
+    )
+    content, stats = render_index(user_client)
+    assert stats == {"misses": 1}
+    assert "Комментарии (1)" in content
+
+
+@pytest.mark.parametrize(
+    "url_template", ("/", "/category/{post.category.slug}/",
+                     "/profile/{post.author.username}/", "/posts/{post.id}/")
+)
+def test_anonymous_pages_are_cached_until_post_changes(
+    client, django_assert_num_queries, card_post, url_template
+):
+    url = url_template.format(post=card_post)
+    assert client.get(url).status_code == 200
+    # only the conditional request validators hit the database
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert response.status_code == 200
+
+    card_post.title = "Новый заголовок"
+    card_post.save()
+    assert "Новый заголовок" in client.get(url).content.decode(), (
+        "Убедитесь, что кэш страниц сбрасывается при изменении публикации."
+    )
+
+
+def test_anonymous_detail_page_is_invalidated_by_comment(
+    mixer: Mixer, client, card_post
+):
+    url = f"/posts/{card_post.id}/"
+    client.get(url)
+    mixer.blend("blog.Comment", post=card_post, text="Свежий комментарий")
+    assert "Свежий комментарий" in client.get(url).content.decode()
+
+
+def test_authenticated_pages_are_not_cached(user_client, card_post):
+    user_client.get("/")
+    response = user_client.get("/")
+    assert response.context is not None, (
+        "Убедитесь, что страницы для авторизованных пользователей не"
+        " отдаются из общего кэша."
+    )
+
+
+def test_page_cache_expires_when_scheduled_post_goes_live(
+    mixer: Mixer, user, published_category
+):
+    mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(seconds=30),
+    )
+    assert seconds_until_next_publication(PAGE_CACHE_TIMEOUT) <= 30
+
+
+@pytest.mark.parametrize(
+    "url_template", ("/", "/category/{post.category.slug}/",
+                     "/profile/{post.author.username}/", "/posts/{post.id}/")
+)
+def test_repeat_request_is_answered_with_not_modified(
+    client, django_assert_num_queries, card_post, url_template
+):
+    url = url_template.format(post=card_post)
+    response = client.get(url)
+    assert response.has_header("ETag")
+    assert response.has_header("Last-Modified")
+
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304, (
+        "Убедитесь, что повторный запрос с актуальным ETag получает ответ"
+        " 304 Not Modified."
+    )
+
+
+def test_etag_changes_when_post_or_comments_change(
+    mixer: Mixer, client, card_post
+):
+    url = f"/posts/{card_post.id}/"
+    etag = client.get(url)["ETag"]
+    mixer.blend("blog.Comment", post=card_post)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_etag_differs_per_user(client, user_client, card_post):
+    url = f"/posts/{card_post.id}/"
+    anonymous_etag = client.get(url)["ETag"]
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=anonymous_etag)
+    assert response.status_code == 200
+    assert not response.has_header("Last-Modified")
+
+
+def test_profile_edit_only_expires_profile_page(client, card_post):
+    user = card_post.author
+    profile_url = f"/profile/{user.username}/"
+    client.get("/")
+    client.get(profile_url)
+    with CaptureQueriesContext(connection) as ctx:
+        client.get("/")
+    cached_queries = len(ctx.captured_queries)
+
+    user.first_name = "Новое"
+    user.last_name = "Имя"
+    user.save()
+    assert "Новое Имя" in client.get(profile_url).content.decode(), (
+        "Убедитесь, что правка профиля сбрасывает кэш страницы профиля."
+    )
+    with CaptureQueriesContext(connection) as ctx:
+        client.get("/")
+    assert len(ctx.captured_queries) == cached_queries, (
+        "Убедитесь, что правка профиля без смены имени пользователя не"
+        " сбрасывает кэш остальных страниц."
+    )
+
+    user.username = "renamed"
+    user.save()
+    assert "@renamed" in client.get("/").content.decode(), (
+        "Убедитесь, что смена имени пользователя сбрасывает кэш страниц,"
+        " где оно показано."
+    )
+
+
+def count_delete_queries(instance):
+    with CaptureQueriesContext(connection) as ctx:
+        instance.delete()
+    return len(ctx.captured_queries)
+
+
+def test_post_delete_cost_does_not_depend_on_comments(
+    mixer: Mixer, user, published_category
+):
+    few, many = mixer.cycle(2).blend(
+        "blog.Post", author=user, category=published_category)
+    mixer.cycle(1).blend("blog.Comment", post=few)
+    mixer.cycle(50).blend("blog.Comment", post=many)
+    assert count_delete_queries(few) == count_delete_queries(many), (
+        "Убедитесь, что удаление публикации не выполняет запросов на"
+        " каждый её комментарий."
+    )
+
+
+def test_deleted_author_comments_invalidate_other_post_once(
+    mixer: Mixer, client, another_user, card_post
+):
+    url = f"/posts/{card_post.id}/"
+    comments = mixer.cycle(5).blend(
+        "blog.Comment", post=card_post, author=another_user,
+        text="Чужой комментарий")
+    etag = client.get(url)["ETag"]
+    with CaptureQueriesContext(connection) as ctx:
+        another_user.delete()
+    touches = [
+        query for query in ctx.captured_queries
+        if query["sql"].startswith('UPDATE "blog_post"')
+    ]
+    assert len(touches) == 1, (
+        "Убедитесь, что публикация обновляется один раз, а не на каждый"
+        " удалённый комментарий."
+    )
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert comments[0].text not in response.content.decode()
+
+
+@pytest.mark.parametrize(
+    "change",
+    (
+        lambda post: post.delete(),
+        lambda post: setattr(
+            post.category, "is_published", False
+        ) or post.category.save(),
+    ),
+    ids=["post delete", "category unpublish"],
+)
+def test_last_modified_moves_on_delete_and_toggle(
+    mixer: Mixer, client, card_post, monkeypatch, change
+):
+    mixer.blend(
+        "blog.Post", author=card_post.author,
+        category=mixer.blend("blog.Category", is_published=True))
+    last_modified = client.get("/")["Last-Modified"]
+    later = time.time_ns() + 5 * 10**9
+    monkeypatch.setattr(time, "time_ns", lambda: later)
+    change(card_post)
+    response = client.get("/", HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 200, (
+        "Убедитесь, что Last-Modified ленты меняется при удалении"
+        " публикации и при снятии категории с публикации."
+    )
@@ -0,0 +1,90 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_views_keep_comment_count_in_sync(
+    user_client, post_with_published_location
+):
+    post = post_with_published_location
+    add_url = f"/posts/{post.id}/comment/"
+    user_client.post(add_url, data={"text": "Первый"})
+    user_client.post(add_url, data={"text": "Второй"})
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при создании комментария увеличивается счётчик"
+        " комментариев публикации."
+    )
+
+    comment = post.comments.first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что при удалении комментария уменьшается счётчик"
+        " комментариев публикации."
+    )
+
+
+def stored_and_real_counts(posts):
+    return (
+        [Post.objects.get(pk=post.pk).comment_count for post in posts],
+        [post.comments.count() for post in posts],
+    )
+
+
+@pytest.mark.parametrize("delete", ("admin", "delete_selected", "user"))
+def test_comment_deletes_outside_views_keep_comment_count_in_sync(
+    mixer: Mixer, admin_client, user, another_user, published_category,
+    delete
+):
+    posts = mixer.cycle(2).blend(
+        "blog.Post", author=user, category=published_category)
+    mixer.blend("blog.Comment", post=posts[0], author=user)
+    comments = [
+        mixer.blend("blog.Comment", post=post, author=another_user)
+        for post in (posts[0], posts[0], posts[1])
+    ]
+    stored, before = stored_and_real_counts(posts)
+    assert stored == before == [3, 1], (
+        "Убедитесь, что счётчик комментариев увеличивается при любом"
+        " создании комментария."
+    )
+
+    if delete == "admin":
+        admin_client.post(
+            f"/admin/blog/comment/{comments[0].pk}/delete/", {"post": "yes"})
+    elif delete == "delete_selected":
+        admin_client.post("/admin/blog/comment/", {
+            "action": "delete_selected",
+            "_selected_action": [comment.pk for comment in comments],
+            "post": "yes",
+        })
+    else:
+        another_user.delete()
+    stored, real = stored_and_real_counts(posts)
+    assert real != before
+    assert stored == real, (
+        "Убедитесь, что счётчик комментариев уменьшается при удалении"
+        " комментариев через админку и при удалении их автора."
+    )
+
+
+def test_rebuild_comment_counts_command(
+    mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    Post.objects.update(comment_count=0)
+
+    call_command("rebuild_comment_counts", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что команда `rebuild_comment_counts` пересчитывает"
+        " счётчики комментариев."
+    )
@@ -0,0 +1,77 @@
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from blog.models import Category, Comment, Location, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_export_import_round_trip(
+    tmp_path, comment, post_with_published_location
+):
+    dump = tmp_path / "blog.jsonl"
+    call_command("export_blog", output=str(dump), batch_size=2,
+                 stdout=StringIO())
+    lines = [json.loads(line) for line in dump.read_text().splitlines()]
+    labels = [line["model"] for line in lines]
+    assert labels == sorted(labels, key=[
+        "blog.category", "blog.location", "auth.user", "blog.post",
+        "blog.comment"].index), (
+        "Убедитесь, что команда `export_blog` выгружает таблицы в порядке"
+        " внешних ключей."
+    )
+
+    before = {
+        model: list(model.objects.order_by("pk").values())
+        for model in (Category, Location, Post, Comment)}
+    # import_blog rebuilds the counters the fixtures leave at zero
+    for post in before[Post]:
+        post["comment_count"] = Comment.objects.filter(
+            post_id=post["id"]).count()
+    Comment.objects.all().delete()
+    Post.objects.all().delete()
+    Location.objects.all().delete()
+    Category.objects.all().delete()
+    get_user_model().objects.all().delete()
+
+    call_command("import_blog", str(dump), batch_size=2, stdout=StringIO())
+    after = {
+        model: list(model.objects.order_by("pk").values())
+        for model in before}
+    assert after == before, (
+        "Убедитесь, что `import_blog` восстанавливает выгрузку"
+        " `export_blog` без изменений, включая даты создания."
+    )
+
+
+def test_import_reads_db_json_style_array(tmp_path):
+    fixture = [
+        {"model": "blog.post", "pk": 10, "fields": {
+            "title": "Заголовок", "text": "Текст", "author": 5,
+            "category": 3, "location": None, "is_published": True,
+            "created_at": "2022-12-18T23:03:52.159Z",
+            "pub_date": "2022-12-18T23:03:52.159Z"}},
+        {"model": "admin.logentry", "pk": 1, "fields": {}},
+        {"model": "auth.user", "pk": 5, "fields": {
+            "username": "author", "password": "!",
+            "date_joined": "2022-12-18T22:57:29.299Z",
+            "groups": [], "user_permissions": []}},
+        {"model": "blog.category", "pk": 3, "fields": {
+            "title": "Категория", "description": "Описание",
+            "slug": "category", "is_published": True,
+            "created_at": "2022-12-18T23:03:52.159Z"}},
+    ]
+    path = tmp_path / "db.json"
+    path.write_text(json.dumps(fixture, indent=2, ensure_ascii=False))
+
+    out = StringIO()
+    call_command("import_blog", str(path), stdout=out)
+    post = Post.objects.get(pk=10)
+    assert post.author.username == "author"
+    assert post.category.slug == "category"
+    assert post.created_at.year == 2022
+    assert "skipped 1" in out.getvalue()
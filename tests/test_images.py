@@ -0,0 +1,193 @@
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from PIL import Image
+
+from blog.images import VARIANT_WIDTHS, variant_name
+from blog.jobs import MAX_ATTEMPTS, requeue_stale_jobs
+from blog.models import ImageJob, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_jpeg(width, height):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color=(73, 109, 137)).save(
+        buffer, format="JPEG"
+    )
+    return buffer.getvalue()
+
+
+def process_image_jobs():
+    call_command("process_image_jobs", once=True,
+                 stdout=StringIO(), stderr=StringIO())
+
+
+def test_create_post_generates_image_variants(
+    user_client, published_category
+):
+    user_client.post(
+        "/posts/create/",
+        data={
+            "title": "С фото",
+            "text": "Текст",
+            "pub_date": timezone.now().strftime("%Y-%m-%d %H:%M"),
+            "category": published_category.id,
+            "image": SimpleUploadedFile(
+                "big.jpg", make_jpeg(1000, 500), content_type="image/jpeg"
+            ),
+        },
+    )
+    post = Post.objects.get(title="С фото")
+    assert post.image_variants == [], (
+        "Убедитесь, что фото обрабатывается в фоне, а не во время запроса."
+    )
+    content = user_client.get(
+        f"/profile/{post.author.username}/"
+    ).content.decode()
+    assert post.image.url in content and "srcset=" not in content, (
+        "Убедитесь, что до обработки фото показывается оригинал."
+    )
+
+    process_image_jobs()
+    post.refresh_from_db()
+    assert post.image_variants == [320, 640], (
+        "Убедитесь, что при загрузке фото создаются уменьшенные копии,"
+        " не превышающие размер оригинала."
+    )
+    storage = post.image.storage
+    for width in post.image_variants:
+        with storage.open(variant_name(post.image.name, width)) as file:
+            assert Image.open(file).width == width
+
+    content = user_client.get(
+        f"/profile/{post.author.username}/"
+    ).content.decode()
+    assert "srcset=" in content
+    assert variant_name(post.image.url, 640) in content
+
+
+def test_generate_image_variants_command_backfills_old_posts(
+    mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        image=SimpleUploadedFile("old.jpg", make_jpeg(2000, 1000)),
+    )
+    assert post.image_variants == []
+
+    call_command("generate_image_variants", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image_variants == list(VARIANT_WIDTHS)
+
+
+def test_generate_image_variants_command_skips_decompression_bomb(
+    mixer, user, published_category, monkeypatch
+):
+    bomb, post = (
+        mixer.blend(
+            "blog.Post",
+            author=user,
+            category=published_category,
+            image=SimpleUploadedFile(name, make_jpeg(*size)),
+        )
+        for name, size in (("bomb.jpg", (2000, 1000)), ("ok.jpg", (800, 400)))
+    )
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 500_000)
+
+    stderr = StringIO()
+    call_command(
+        "generate_image_variants", stdout=StringIO(), stderr=stderr)
+    post.refresh_from_db()
+    assert post.image_variants, (
+        "Убедитесь, что ошибка Pillow `DecompressionBombError` на одном фото"
+        " не останавливает команду `generate_image_variants`."
+    )
+    assert f"Post {bomb.pk}:" in stderr.getvalue()
+
+
+def test_failed_image_job_is_retried_then_given_up(
+    mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        image=SimpleUploadedFile("broken.jpg", b"not an image"),
+    )
+    job = ImageJob.objects.create(post=post, image_name=post.image.name)
+
+    process_image_jobs()
+    job.refresh_from_db()
+    assert job.status == ImageJob.PENDING and job.attempts == 1
+    assert job.run_after > timezone.now(), (
+        "Убедитесь, что неудачная обработка фото откладывается на потом."
+    )
+
+    for _ in range(MAX_ATTEMPTS - 1):
+        ImageJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        process_image_jobs()
+    job.refresh_from_db()
+    assert job.status == ImageJob.FAILED
+    assert job.attempts == MAX_ATTEMPTS
+    assert job.last_error
+
+
+def test_image_job_for_replaced_image_is_skipped(
+    mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        image=SimpleUploadedFile("new.jpg", make_jpeg(1000, 500)),
+    )
+    job = ImageJob.objects.create(post=post, image_name="posts_images/old.jpg")
+    process_image_jobs()
+    job.refresh_from_db()
+    post.refresh_from_db()
+    assert job.status == ImageJob.DONE
+    assert post.image_variants == []
+
+
+def test_image_job_survives_decompression_bomb(
+    mixer, user, published_category, monkeypatch
+):
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        image=SimpleUploadedFile("bomb.jpg", make_jpeg(100, 100)),
+    )
+    job = ImageJob.objects.create(post=post, image_name=post.image.name)
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 10)
+
+    process_image_jobs()
+    job.refresh_from_db()
+    assert job.status == ImageJob.PENDING and job.last_error, (
+        "Убедитесь, что ошибка Pillow `DecompressionBombError` не"
+        " останавливает обработчик фото."
+    )
+
+
+def test_stale_job_without_attempts_left_fails(
+    mixer, user, published_category
+):
+    post = mixer.blend("blog.Post", author=user, category=published_category)
+    job = ImageJob.objects.create(
+        post=post, image_name="posts_images/stuck.jpg",
+        status=ImageJob.RUNNING, attempts=MAX_ATTEMPTS,
+        locked_at=timezone.now() - timedelta(hours=1))
+
+    requeue_stale_jobs()
+    job.refresh_from_db()
+    assert job.status == ImageJob.FAILED, (
+        "Убедитесь, что зависшая задача без оставшихся попыток не"
+        " возвращается в очередь."
+    )
@@ -0,0 +1,74 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+
+from core.metrics import metrics
+
+pytestmark = [pytest.mark.django_db]
+
+METRICS_URL = "/metrics/"
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.clear()
+    yield
+    metrics.clear()
+
+
+def test_metrics_exposition(
+    client, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    client.get("/")
+    client.get("/")
+    user_client.post(f"/posts/{post.id}/comment/", data={"text": "Текст"})
+
+    response = client.get(METRICS_URL)
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"].startswith("text/plain")
+    body = response.content.decode()
+    assert (
+        'blogicum_requests_total{status="200",view="blog:index"} 2'
+        in body
+    ), "Убедитесь, что запросы считаются по представлениям."
+    assert 'blogicum_request_duration_seconds_bucket{view="blog:index",' \
+        'le="+Inf"} 2' in body
+    assert 'blogicum_request_queries_count{view="blog:index"} 2' in body
+    assert 'blogicum_cache_requests_total{cache="page",result="hit"} 1' \
+        in body
+    assert 'blogicum_cache_hit_ratio{cache="page"} 0.5' in body
+    assert "blogicum_comments_created_total 1" in body
+
+
+def test_metrics_are_added_up_across_workers(client, tmp_path):
+    (tmp_path / "worker-1.json").write_text(json.dumps([
+        ["blogicum_posts_created_total", [], [3]],
+    ]))
+    with override_settings(METRICS_MULTIPROC_DIR=str(tmp_path)):
+        metrics.inc("blogicum_posts_created_total")
+        body = client.get(METRICS_URL).content.decode()
+    assert "blogicum_posts_created_total 4" in body, (
+        "Убедитесь, что метрики всех процессов из общего каталога"
+        " суммируются."
+    )
+
+
+def test_metrics_endpoint_rejects_other_addresses(client):
+    response = client.get(METRICS_URL, REMOTE_ADDR="10.0.0.1")
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+@override_settings(METRICS_TOKEN="secret")
+def test_metrics_token_replaces_address_check(client):
+    response = client.get(METRICS_URL)
+    assert response.status_code == HTTPStatus.FORBIDDEN, (
+        "Убедитесь, что при заданном `METRICS_TOKEN` адрес 127.0.0.1 не"
+        " даёт доступа к метрикам: за прокси он есть у всех клиентов."
+    )
+    response = client.get(
+        METRICS_URL, HTTP_AUTHORIZATION="Bearer secret",
+        REMOTE_ADDR="10.0.0.1")
+    assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,169 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def index_posts(mixer: Mixer, user, published_category):
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        "blog.Post", author=user, category=published_category
+    )
+
+
+def test_index_keyset_pagination_walks_whole_feed(client, index_posts):
+    expected = sorted(
+        index_posts, key=lambda post: (post.pub_date, post.id), reverse=True
+    )
+    pages = [client.get("/").context["page_obj"]]
+    while pages[-1].has_next():
+        pages.append(
+            client.get(
+                "/", {"after": pages[-1].next_cursor}
+            ).context["page_obj"]
+        )
+    seen = [post for page in pages for post in page]
+    assert seen == expected, (
+        "Убедитесь, что курсорная пагинация на главной странице проходит"
+        " все публикации по порядку без пропусков и повторов."
+    )
+    assert not pages[0].has_previous()
+
+    previous = client.get(
+        "/", {"before": pages[-1].previous_cursor}
+    ).context["page_obj"]
+    assert list(previous) == list(pages[-2])
+
+
+def explain_feed_queries(client, url, params):
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url, params)
+    plans = []
+    with connection.cursor() as cursor:
+        for query in queries:
+            if 'ORDER BY "blog_post"."pub_date"' not in query["sql"]:
+                continue
+            cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+            plans.append([row[-1] for row in cursor.fetchall()])
+    return plans
+
+
+def test_index_keyset_pages_are_read_in_index_order(
+    mixer: Mixer, client, index_posts
+):
+    mixer.blend("blog.Category", is_published=True)
+    first = client.get("/").context["page_obj"]
+    second = client.get("/", {"after": first.next_cursor}).context["page_obj"]
+    for params in (
+        {}, {"after": first.next_cursor}, {"before": second.previous_cursor}
+    ):
+        plans = explain_feed_queries(client, "/", params)
+        assert plans
+        for plan in plans:
+            assert not any("TEMP B-TREE" in step for step in plan), (
+                "Убедитесь, что курсорная пагинация читает публикации в"
+                f" порядке индекса, без сортировки всей ленты: {plan}"
+            )
+
+
+def test_index_keyset_pagination_ignores_malformed_cursor(
+    client, index_posts
+):
+    response = client.get("/", {"after": "not-a-cursor"})
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+def blend_category_pages(category, user, n_pages):
+    Post.objects.bulk_create(
+        Post(
+            title=f"Пост {i}",
+            text="Текст",
+            pub_date=timezone.now() - timedelta(minutes=i),
+            author=user,
+            category=category,
+        )
+        for i in range(n_pages * N_PER_PAGE)
+    )
+
+
+def test_paginator_renders_bounded_page_window(mixer: Mixer, client, user):
+    sizes = []
+    for slug, n_pages in (("few", 20), ("lot", 50)):
+        category = mixer.blend(
+            "blog.Category", slug=slug, title="Категория", description="-"
+        )
+        blend_category_pages(category, user, n_pages)
+        response = client.get(f"/category/{slug}/", {"page": 10})
+        sizes.append(len(re.sub(rb"\d", b"", response.content)))
+    assert sizes[0] == sizes[1], (
+        "Убедитесь, что размер блока пагинации не зависит от общего"
+        " количества страниц."
+    )
+
+
+def count_queries_sql(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    return response, [
+        q["sql"] for q in ctx.captured_queries if "COUNT(" in q["sql"]
+    ]
+
+
+def test_category_feed_count_is_cached_until_post_changes(
+    mixer: Mixer, user_client, user, published_category
+):
+    url = f"/category/{published_category.slug}/"
+    blend_category_pages(published_category, user, 2)
+    _, count_sql = count_queries_sql(user_client, url)
+    assert count_sql
+    response, count_sql = count_queries_sql(user_client, url)
+    assert not count_sql, (
+        "Убедитесь, что количество публикаций в ленте берётся из кэша."
+    )
+    assert response.context["page_obj"].paginator.count == 2 * N_PER_PAGE
+
+    mixer.blend("blog.Post", author=user, category=published_category)
+    response, count_sql = count_queries_sql(user_client, url)
+    assert count_sql
+    assert response.context["page_obj"].paginator.count == 2 * N_PER_PAGE + 1
+
+
+def test_post_detail_paginates_comment_thread(
+    mixer: Mixer, client, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(N_PER_PAGE * 2 + 3).blend(
+        "blog.Comment", post=post
+    )
+    response = client.get(f"/posts/{post.id}/")
+    page = response.context["comments"]
+    assert len(page) == N_PER_PAGE, (
+        "Убедитесь, что на странице публикации комментарии выводятся"
+        " постранично."
+    )
+
+    seen = list(page)
+    while page.has_next():
+        response = client.get(
+            f"/posts/{post.id}/comments/",
+            {"comments_after": page.next_cursor},
+        )
+        assert response.status_code == 200
+        assert "<html" not in response.content.decode()
+        page = response.context["comments"]
+        seen += list(page)
+    assert [c.id for c in seen] == [
+        c.id for c in sorted(comments, key=lambda c: (c.created_at, c.id))
+    ]
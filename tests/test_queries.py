@@ -0,0 +1,166 @@
+import os
+import subprocess
+import sys
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(ctx.captured_queries)
+
+
+def blend_feed_posts(mixer: Mixer, user, category, location, count):
+    return mixer.cycle(count).blend(
+        "blog.Post",
+        author=user,
+        category=category,
+        location=location,
+    )
+
+
+@pytest.mark.parametrize(
+    "url_template",
+    ("/", "/category/{category.slug}/", "/profile/{user.username}/"),
+)
+def test_feed_query_count_does_not_depend_on_page_size(
+    mixer: Mixer,
+    user,
+    user_client,
+    published_category,
+    published_location,
+    url_template,
+):
+    url = url_template.format(category=published_category, user=user)
+    blend_feed_posts(mixer, user, published_category, published_location, 1)
+    # measure warm requests, with the table caches and feed totals filled
+    user_client.get(url)
+    single_card = count_queries(user_client, url)
+    blend_feed_posts(
+        mixer, user, published_category, published_location, N_PER_PAGE
+    )
+    user_client.get(url)
+    full_page = count_queries(user_client, url)
+    assert single_card == full_page, (
+        "Убедитесь, что количество запросов к БД на странице ленты не зависит"
+        " от количества карточек публикаций на странице."
+    )
+
+
+def test_index_feed_shows_post_once_its_pub_date_passes(
+    mixer: Mixer, user, user_client, published_category, published_location
+):
+    now = timezone.now()
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        location=published_location,
+        pub_date=now + timedelta(hours=1),
+    )
+    assert post not in user_client.get("/").context["page_obj"]
+    later = now + timedelta(hours=2)
+    with mock.patch("django.utils.timezone.now", return_value=later):
+        response = user_client.get("/")
+    assert post in response.context["page_obj"], (
+        "Убедитесь, что отложенная публикация появляется на главной странице"
+        " сразу после наступления даты публикации."
+    )
+
+
+@pytest.mark.parametrize(
+    "url_template, expected_queries",
+    (
+        # validators, session, user, post, comments
+        ("/posts/{post.id}/", 5),
+        # session, user, post, category and location choices
+        ("/posts/{post.id}/edit/", 5),
+        # session, user, post
+        ("/posts/{post.id}/delete/", 3),
+    ),
+)
+def test_post_pages_fetch_post_once(
+    user_client,
+    post_with_published_location,
+    django_assert_num_queries,
+    url_template,
+    expected_queries,
+):
+    url = url_template.format(post=post_with_published_location)
+    user_client.get(url)
+    with django_assert_num_queries(expected_queries):
+        response = user_client.get(url)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "url_template",
+    (
+        "/",
+        "/category/{post.category.slug}/",
+        "/profile/{post.author.username}/",
+        "/posts/{post.id}/",
+    ),
+)
+def test_pages_take_categories_and_locations_from_table_cache(
+    user_client, post_with_published_location, url_template
+):
+    url = url_template.format(post=post_with_published_location)
+    user_client.get(url)
+    with CaptureQueriesContext(connection) as ctx:
+        content = user_client.get(url).content.decode()
+    assert post_with_published_location.location.name in content
+    assert not any(
+        table in query["sql"]
+        for query in ctx.captured_queries
+        for table in ('"blog_category"', '"blog_location"')
+    ), (
+        "Убедитесь, что категории и местоположения берутся из кэша, а не"
+        " из базы данных."
+    )
+
+
+def test_table_cache_reloads_after_bump_in_another_process(
+    published_category, monkeypatch
+):
+    from blog import lookups
+    from blog.models import Category
+
+    monkeypatch.setattr(lookups, "CHECK_INTERVAL", 0)
+    assert lookups.categories.get_published_by_slug("fresh") is None
+    # no signals: only the bump from the other process announces the row
+    Category.objects.bulk_create([
+        Category(title="Новая", description="Описание", slug="fresh")
+    ])
+    assert lookups.categories.get_published_by_slug("fresh") is None
+
+    subprocess.run(
+        [
+            sys.executable, "-c",
+            "import django; django.setup(); "
+            "from blog.caching import invalidate_post_cards; "
+            "invalidate_post_cards('category')",
+        ],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "PYTHONPATH": str(settings.BASE_DIR),
+             "DJANGO_SETTINGS_MODULE": "blogicum.settings",
+             "BLOGICUM_CACHE_DIR": settings.CACHES["default"]["LOCATION"]},
+        check=True,
+    )
+    assert lookups.categories.get_published_by_slug("fresh") is not None, (
+        "Убедитесь, что кэш версий общий для всех процессов: изменение"
+        " категории в одном воркере должно быть видно в остальных."
+    )
@@ -0,0 +1,118 @@
+import json
+import time
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+
+from core.instrumentation import CLEARED_FILE, request_metrics
+
+pytestmark = [pytest.mark.django_db]
+
+METRICS_URL = "/admin/request-metrics/"
+
+
+@pytest.fixture
+def staff_client(client, django_user_model):
+    staff = django_user_model.objects.create_user(
+        "staff", password="staff", is_staff=True)
+    client.force_login(staff)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def clear_request_metrics():
+    request_metrics.clear()
+    yield
+    request_metrics.clear()
+
+
+def test_requests_are_aggregated_per_view(
+    client, post_with_published_location
+):
+    client.get("/")
+    client.get("/")
+    client.get(f"/posts/{post_with_published_location.id}/")
+    client.get("/pages/about/")
+    client.get("/no-such-page/")
+
+    views = request_metrics.snapshot()["views"]
+    assert views["blog:index"]["requests"] == 2, (
+        "Убедитесь, что запросы учитываются по имени представления из"
+        " `request.resolver_match.view_name`."
+    )
+    detail = views["blog:post_detail"]
+    assert detail["queries"]["sum"] > 0
+    assert detail["render_ms"] > 0
+    assert detail["response_bytes"] > 0
+    assert detail["statuses"] == {"200": 1}
+    assert "pages:about" in views
+    assert views["<unresolved>"]["statuses"] == {"404": 1}
+
+
+@override_settings(REQUEST_METRICS_SLOW_MS=0)
+def test_slow_requests_are_sampled_with_sql(client):
+    client.get("/")
+    sample = request_metrics.snapshot()["slow_requests"][-1]
+    assert sample["view"] == "blog:index"
+    assert sample["sql"], (
+        "Убедитесь, что медленные запросы сохраняются вместе с их SQL."
+    )
+
+
+def test_metrics_endpoint_is_staff_only(
+    user_client, staff_client
+):
+    response = user_client.get(METRICS_URL)
+    assert response.status_code == HTTPStatus.FOUND
+
+    response = staff_client.get(METRICS_URL)
+    assert response.status_code == HTTPStatus.OK
+    assert "views" in response.json()
+
+    staff_client.post(METRICS_URL)
+    assert list(request_metrics.snapshot()["views"]) == [
+        "request_metrics"]
+
+
+def test_endpoint_adds_up_all_workers(client, staff_client, tmp_path):
+    client.get("/")
+    other_worker = {"cleared_at": 0, **request_metrics.snapshot()}
+    (tmp_path / "requests-1.json").write_text(json.dumps(other_worker))
+    request_metrics.clear()
+
+    assert staff_client.get(METRICS_URL).json()["scope"] == (
+        "this worker only"
+    )
+    with override_settings(METRICS_MULTIPROC_DIR=str(tmp_path)):
+        client.get("/")
+        body = staff_client.get(METRICS_URL).json()
+    assert body["scope"] == "all workers" and body["workers"] == 2
+    assert body["views"]["blog:index"]["requests"] == 2, (
+        "Убедитесь, что при заданном METRICS_MULTIPROC_DIR страница"
+        " показывает сумму показателей всех процессов."
+    )
+    assert body["views"]["blog:index"]["duration_ms"]["count"] == 2
+
+
+@override_settings(METRICS_FLUSH_INTERVAL=0)
+def test_clear_reaches_all_workers(client, staff_client, tmp_path):
+    client.get("/")
+    other_worker = {"cleared_at": 0, **request_metrics.snapshot()}
+    (tmp_path / "requests-1.json").write_text(json.dumps(other_worker))
+    with override_settings(METRICS_MULTIPROC_DIR=str(tmp_path)):
+        staff_client.post(METRICS_URL)
+        body = staff_client.get(METRICS_URL).json()
+        assert "blog:index" not in body["views"], (
+            "Убедитесь, что очистка показателей действует на все процессы."
+        )
+
+        client.get("/")
+        (tmp_path / CLEARED_FILE).write_text(repr(time.time()))
+        client.get("/pages/about/")
+        client.get("/pages/rules/")
+        views = request_metrics.snapshot()["views"]
+    assert list(views) == ["pages:rules"], (
+        "Убедитесь, что процесс сбрасывает свои показатели, увидев отметку"
+        " об очистке в общем каталоге."
+    )
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+from blog.search import to_match_query
+from blog.views import get_posts_qs_by_search
+
+pytestmark = [pytest.mark.django_db]
+
+
+def search(client, query, **params):
+    response = client.get("/search/", {"q": query, **params})
+    assert response.status_code == 200
+    return response.context["page_obj"]
+
+
+def test_search_ranks_title_matches_first(
+    mixer: Mixer, user_client, user, published_category
+):
+    in_text = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        title="Заметка", text="Прогулка по набережной",
+    )
+    in_title = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        title="Набережная вечером", text="Текст",
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        title="Другое", text="Совсем другое",
+    )
+    assert list(search(user_client, "набережн")) == [in_title, in_text], (
+        "Убедитесь, что поиск находит публикации по началу слова и ставит"
+        " совпадения в заголовке выше."
+    )
+
+
+def test_search_respects_visibility(
+    mixer: Mixer, user_client, user, published_category
+):
+    hidden_category = mixer.blend("blog.Category", is_published=False)
+    hidden = {
+        "unpublished": {"is_published": False},
+        "scheduled": {"pub_date": timezone.now() + timedelta(days=1)},
+        "hidden category": {"category": hidden_category},
+    }
+    for title, overrides in hidden.items():
+        mixer.blend(
+            "blog.Post", author=user, title=f"Секрет {title}",
+            **{"category": published_category, "is_published": True,
+               **overrides},
+        )
+    assert not list(search(user_client, "секрет")), (
+        "Убедитесь, что поиск не показывает публикации, скрытые из ленты."
+    )
+
+
+def test_search_index_follows_post_changes(
+    mixer: Mixer, user_client, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, title="Старый"
+    )
+    Post.objects.filter(pk=post.pk).update(title="Обновлённый")
+    assert list(search(user_client, "обновлённый")) == [post]
+    assert not list(search(user_client, "старый"))
+
+    post.delete()
+    assert not list(search(user_client, "обновлённый"))
+
+
+def test_search_is_paginated(
+    mixer: Mixer, user_client, user, published_category
+):
+    mixer.cycle(12).blend(
+        "blog.Post", author=user, category=published_category, title="Кот"
+    )
+    page = search(user_client, "кот", page=2)
+    assert page.paginator.count == 12
+    assert len(page) == 2
+
+
+def test_search_starts_from_the_index(published_category):
+    sql, params = get_posts_qs_by_search("кот")[:10].query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        plan = [row[-1] for row in cursor.fetchall()]
+    assert "blog_post_fts" in plan[0], (
+        "Убедитесь, что поиск начинается с полнотекстового индекса, а не"
+        f" перебирает публикации ленты: {plan}"
+    )
+
+
+def test_search_query_is_escaped():
+    assert to_match_query('кот" OR NEAR(пёс') == '"кот"* "OR"* "NEAR"* "пёс"*'
+    assert to_match_query("  ") == ""
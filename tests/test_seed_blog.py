@@ -0,0 +1,52 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+
+pytestmark = [pytest.mark.django_db]
+
+SEED_OPTIONS = dict(users=5, categories=3, locations=2, posts=40,
+                    comments=120, batch_size=7, scheduled=0.25,
+                    unpublished=0.25)
+
+
+def test_seed_blog_creates_requested_rows():
+    out = StringIO()
+    call_command("seed_blog", stdout=out, **SEED_OPTIONS)
+    assert Category.objects.count() == 3
+    assert Location.objects.count() == 2
+    assert Post.objects.count() == 40
+    assert Comment.objects.count() == 120
+    assert "rows/s" in out.getvalue()
+
+    posts = Post.objects.all()
+    assert posts.filter(is_published=False).exists(), (
+        "Убедитесь, что команда `seed_blog` создаёт и снятые с публикации"
+        " посты."
+    )
+    assert posts.filter(pub_date__gt=timezone.now()).exists(), (
+        "Убедитесь, что команда `seed_blog` создаёт отложенные посты."
+    )
+    assert sum(post.comment_count for post in posts) == 120, (
+        "Убедитесь, что команда `seed_blog` заполняет счётчики"
+        " комментариев."
+    )
+
+
+def test_seed_blog_is_deterministic():
+    def snapshot():
+        return list(Post.objects.order_by("pk").values_list(
+            "title", "is_published", "comment_count"))
+
+    call_command("seed_blog", stdout=StringIO(), **SEED_OPTIONS)
+    first = snapshot()
+    Post.objects.all().delete()
+    call_command("seed_blog", stdout=StringIO(), prefix="again",
+                 **SEED_OPTIONS)
+    assert snapshot() == first, (
+        "Убедитесь, что команда `seed_blog` с тем же `--seed` генерирует"
+        " те же данные."
+    )
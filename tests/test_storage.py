@@ -0,0 +1,167 @@
+import os
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def image_content():
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), color=tuple(os.urandom(3))).save(
+        buffer, format="JPEG"
+    )
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def storage():
+    return Post._meta.get_field("image").storage
+
+
+def blend_post(mixer, user, category, content, name="photo.jpg"):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=category,
+        image=SimpleUploadedFile(name, content),
+    )
+
+
+def test_identical_uploads_share_one_file(
+    mixer, user, published_category, image_content, storage
+):
+    first = blend_post(mixer, user, published_category, image_content)
+    second = blend_post(
+        mixer, user, published_category, image_content, "copy.JPG"
+    )
+    assert first.image.name == second.image.name, (
+        "Убедитесь, что одинаковые фото хранятся в одном файле."
+    )
+    assert storage.listdir(os.path.dirname(first.image.name))[1] == [
+        os.path.basename(first.image.name)
+    ]
+
+
+def test_image_is_deleted_with_its_last_post(
+    mixer, user, published_category, image_content, storage,
+    django_capture_on_commit_callbacks
+):
+    first = blend_post(mixer, user, published_category, image_content)
+    second = blend_post(mixer, user, published_category, image_content)
+    name = first.image.name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert storage.exists(name), (
+        "Убедитесь, что фото не удаляется, пока на него ссылаются другие"
+        " публикации."
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    assert not storage.exists(name), (
+        "Убедитесь, что фото удаляется вместе с последней публикацией,"
+        " которая на него ссылается."
+    )
+
+
+def test_replaced_image_is_deleted(
+    mixer, user, published_category, image_content, storage,
+    django_capture_on_commit_callbacks
+):
+    post = blend_post(mixer, user, published_category, image_content)
+    old_name = post.image.name
+    post.image = SimpleUploadedFile("new.jpg", image_content + b"\0")
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    assert post.image.name != old_name
+    assert not storage.exists(old_name)
+
+
+def test_dedup_images_command_moves_legacy_files(
+    mixer, user, published_category, image_content, storage,
+    django_capture_on_commit_callbacks
+):
+    legacy_storage = FileSystemStorage(location=storage.location)
+    legacy_names = [
+        legacy_storage.save("images/legacy.jpg", ContentFile(image_content))
+        for _ in range(2)
+    ]
+    posts = mixer.cycle(2).blend(
+        "blog.Post", author=user, category=published_category
+    )
+    for post, name in zip(posts, legacy_names):
+        Post.objects.filter(pk=post.pk).update(image=name)
+
+    out = StringIO()
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("dedup_images", stdout=out)
+    assert "duplicates: 1" in out.getvalue()
+
+    names = set(
+        Post.objects.filter(pk__in=[post.pk for post in posts]).values_list(
+            "image", flat=True
+        )
+    )
+    assert len(names) == 1
+    assert storage.exists(names.pop())
+    assert not any(legacy_storage.exists(name) for name in legacy_names)
+
+
+def test_reused_image_released_before_commit_is_restored(
+    mixer, user, published_category, image_content, storage, monkeypatch,
+    django_capture_on_commit_callbacks
+):
+    first = blend_post(mixer, user, published_category, image_content)
+    name = first.image.name
+    save = type(storage).save
+
+    def save_during_release(self, *args, **kwargs):
+        stored = save(self, *args, **kwargs)
+        # a release of another post deletes the file before this commit
+        self.delete(stored)
+        return stored
+
+    monkeypatch.setattr(type(storage), "save", save_during_release)
+    with django_capture_on_commit_callbacks(execute=True):
+        Post.objects.filter(pk=first.pk).delete()
+        second = blend_post(mixer, user, published_category, image_content)
+    assert second.image.name == name
+    assert storage.exists(name), (
+        "Убедитесь, что фото, удалённое параллельной очисткой до сохранения"
+        " публикации, записывается заново."
+    )
+    with storage.open(name) as file:
+        assert file.read() == image_content
+
+
+def test_release_keeps_image_referenced_after_first_check(
+    mixer, user, published_category, image_content, storage, monkeypatch
+):
+    from blog import images
+
+    post = blend_post(mixer, user, published_category, image_content)
+    name = post.image.name
+    other = mixer.blend("blog.Post", author=user, category=published_category)
+    Post.objects.filter(pk=post.pk).delete()
+    replace = os.replace
+
+    def replace_while_committing(source, target):
+        # an upload of the same bytes commits while the file is moved
+        Post.objects.filter(pk=other.pk).update(image=name)
+        replace(source, target)
+
+    monkeypatch.setattr(images.os, "replace", replace_while_committing)
+    images.release_image(name)
+    assert storage.exists(name), (
+        "Убедитесь, что фото не удаляется, если на него сослалась"
+        " публикация, сохранённая во время очистки."
+    )
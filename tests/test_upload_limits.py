@@ -0,0 +1,71 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from PIL import Image
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_png(width, height):
+    buffer = BytesIO()
+    Image.new("L", (width, height)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def create_post(client, category, content):
+    return client.post(
+        "/posts/create/",
+        data={
+            "title": "С фото",
+            "text": "Текст",
+            "pub_date": timezone.now().strftime("%Y-%m-%d %H:%M"),
+            "category": category.id,
+            "image": SimpleUploadedFile(
+                "photo.png", content, content_type="image/png"
+            ),
+        },
+    )
+
+
+def test_oversized_upload_is_rejected(
+    user_client, published_category, settings
+):
+    settings.BLOG_IMAGE_MAX_BYTES = 1024
+    response = create_post(
+        user_client, published_category, make_png(10, 10) + b"\0" * 4096
+    )
+    assert response.status_code == 200
+    assert "image" in response.context["form"].errors, (
+        "Убедитесь, что слишком большие файлы не принимаются формой"
+        " публикации."
+    )
+    assert not Post.objects.exists()
+
+
+def test_upload_with_too_many_pixels_is_rejected(
+    user_client, published_category, settings
+):
+    settings.BLOG_IMAGE_MAX_PIXELS = 100 * 100
+    response = create_post(user_client, published_category, make_png(101, 100))
+    assert "101×100" in response.context["form"].errors["image"][0], (
+        "Убедитесь, что изображения с превышением лимита пикселей не"
+        " принимаются формой публикации."
+    )
+
+
+def test_decompression_bomb_is_rejected(
+    user_client, published_category, monkeypatch
+):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 50)
+    response = create_post(user_client, published_category, make_png(20, 20))
+    assert "image" in response.context["form"].errors
+    assert not Post.objects.exists()
+
+
+def test_upload_within_limits_is_accepted(user_client, published_category):
+    create_post(user_client, published_category, make_png(20, 20))
+    assert Post.objects.get().image